@@ -0,0 +1,218 @@
+import os
+import math
+import logging
+import threading
+from contextlib import contextmanager
+from solver import tokenize, course_code, TITLE_WEIGHT, TAG_WEIGHT, DESCRIPTION_WEIGHT
+
+# Builds the compact context the Swarm agents see. Tool results used to be every section title
+# in a department, re-sent on every turn of the handoff loop; they are now deduplicated, filtered
+# and ranked against the student's goals, then cut to a hard token budget.
+# Token counts are estimates (about 4 characters per token for English text), which is close
+# enough for budgeting and for tracking savings without pulling in a tokenizer.
+
+logger = logging.getLogger(__name__)
+
+TOOL_RESULT_TOKEN_BUDGET = int(os.getenv("AGENT_TOOL_TOKEN_BUDGET", "600"))
+TOOL_RESULT_TOP_K = int(os.getenv("AGENT_TOOL_TOP_K", "25"))
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Approximate token count of a string.
+    """
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def describe_course(summary):
+    """
+    One line per course, e.g. "CS 3733 - Software Engineering (2 open sections)".
+    """
+    if not summary.open_sections:
+        return f"{summary.title} (full)"
+    plural = "s" if summary.open_sections > 1 else ""
+    return f"{summary.title} ({summary.open_sections} open section{plural})"
+
+
+def relevance(summary, goal_tokens):
+    """
+    Relevance of a course to the student's goals, weighted like the schedule solver.
+    """
+    if not goal_tokens:
+        return 0.0
+    return (
+        TITLE_WEIGHT * len(goal_tokens & summary.title_tokens)
+        + TAG_WEIGHT * len(goal_tokens & summary.tag_tokens)
+        + DESCRIPTION_WEIGHT * len(goal_tokens & summary.description_tokens)
+    )
+
+
+def build_course_context(summaries, completed_courses=(), academic_level=None, future_goals="",
+                         top_k=TOOL_RESULT_TOP_K, token_budget=TOOL_RESULT_TOKEN_BUDGET, scores=None):
+    """
+    Turns a department's course summaries into a tool result: drops completed courses and other
+    academic levels, keeps the top_k most relevant courses (open ones first on ties) and stops
+    before token_budget is exceeded. Completed courses match on title or course code.
+    scores ({title: score}, e.g. from the course index) replaces keyword overlap for relevance.
+    """
+    completed_titles = set(completed_courses)
+    completed_codes = {course_code(title) for title in completed_courses}
+    goal_tokens = tokenize(future_goals)
+    if scores is not None:
+        relevance_of = lambda summary: scores.get(summary.title, 0.0)
+    else:
+        relevance_of = lambda summary: relevance(summary, goal_tokens)
+
+    eligible = [
+        summary for summary in summaries
+        if summary.title not in completed_titles
+        and course_code(summary.title) not in completed_codes
+        and (academic_level is None or summary.academic_level == academic_level)
+    ]
+    ranked = sorted(
+        enumerate(eligible),
+        key=lambda item: (-relevance_of(item[1]), not item[1].open_sections, item[0]),
+    )
+
+    lines = []
+    used = 0
+    for _, summary in ranked[:top_k]:
+        line = describe_course(summary)
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+
+    if not lines:
+        return "No matching courses available."
+    omitted = len(eligible) - len(lines)
+    if omitted:
+        lines.append(f"({omitted} less relevant courses not shown)")
+    return "\n".join(lines)
+
+
+def unfiltered_tool_tokens(summaries, completed_courses=()):
+    """
+    Estimated size of the old tool result: a Python list with every non-completed section title.
+    """
+    completed = set(completed_courses)
+    return sum(
+        summary.sections * estimate_tokens(repr(summary.title) + ", ")
+        for summary in summaries if summary.title not in completed
+    )
+
+
+def format_list(values, empty="none"):
+    """
+    Joins a list for a prompt, e.g. ["Soccer", "Track"] -> "Soccer, Track".
+    """
+    values = [str(value) for value in values or [] if value]
+    return ", ".join(values) if values else empty
+
+
+class PromptTokenMeter:
+    """
+    Estimated prompt tokens for one schedule request. Every completion re-sends the instructions
+    plus the conversation so far, so each one is charged for all the context accumulated before it.
+    """
+
+    def __init__(self, message_tokens=0):
+        self.completions = 0
+        self.prompt_tokens = 0
+        self.context_tokens = message_tokens
+        self.tool_result_tokens = 0
+        self.unfiltered_tool_result_tokens = 0
+
+    def record_instructions(self, text):
+        """
+        Called each time an agent's instructions are built, i.e. once per completion.
+        """
+        self.completions += 1
+        self.prompt_tokens += estimate_tokens(text) + self.context_tokens
+
+    def record_tool_result(self, text, unfiltered_tokens):
+        tokens = estimate_tokens(text)
+        self.context_tokens += tokens
+        self.tool_result_tokens += tokens
+        self.unfiltered_tool_result_tokens += unfiltered_tokens
+
+    def to_dict(self):
+        return {
+            "completions": self.completions,
+            "prompt_tokens": self.prompt_tokens,
+            "tool_result_tokens": self.tool_result_tokens,
+            "unfiltered_tool_result_tokens": self.unfiltered_tool_result_tokens,
+        }
+
+
+class PromptTokenStats:
+    """
+    Running totals over every metered request, for the internal metrics endpoint.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.totals = PromptTokenMeter().to_dict()
+        self.last = None
+        self.lock = threading.Lock()
+
+    def record(self, meter):
+        usage = meter.to_dict()
+        with self.lock:
+            self.requests += 1
+            for key, value in usage.items():
+                self.totals[key] += value
+            self.last = usage
+
+    def snapshot(self):
+        with self.lock:
+            averages = {key: round(value / self.requests, 1) for key, value in self.totals.items()} if self.requests else None
+            return {"requests": self.requests, "totals": dict(self.totals), "average": averages, "last": self.last}
+
+
+prompt_token_stats = PromptTokenStats()
+
+# Swarm calls instructions and tools on the thread that runs the request
+_local = threading.local()
+
+
+def current_meter():
+    """
+    Returns the meter of the request running on this thread, or None.
+    """
+    return getattr(_local, "meter", None)
+
+
+def metered_instructions(instructions):
+    """
+    Wraps agent instructions (a string or a function of context_variables) so every completion
+    that uses them is charged to the current request's meter.
+    """
+    def build(context_variables):
+        text = instructions(context_variables) if callable(instructions) else instructions
+        meter = current_meter()
+        if meter is not None:
+            meter.record_instructions(text)
+        return text
+    return build
+
+
+@contextmanager
+def metered_request(messages):
+    """
+    Meters the prompt tokens of one Swarm run and adds them to prompt_token_stats when it ends.
+    """
+    meter = PromptTokenMeter(sum(estimate_tokens(str(message.get("content") or "")) for message in messages))
+    previous = current_meter()
+    _local.meter = meter
+    try:
+        yield meter
+    finally:
+        _local.meter = previous
+        prompt_token_stats.record(meter)
+        logger.info(
+            f"Schedule prompt ~{meter.prompt_tokens} tokens over {meter.completions} completions "
+            f"(tool results {meter.tool_result_tokens}, unfiltered {meter.unfiltered_tool_result_tokens})"
+        )
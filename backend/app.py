@@ -1,20 +1,39 @@
 import os
 import json
-import bcrypt
 from datetime import datetime, timedelta
 from math import ceil
-from flask import Flask, request, jsonify
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask import Flask, Response, request, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from flask_cors import CORS
 import openai
-from sqlalchemy import create_engine, or_
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import or_
+from db import engine, read_engine, SessionFactory, ReadSessionFactory, pool_metrics
+from request_db import get_db, get_read_db, init_request_sessions
 from models import Base, Department, Course, Instructor, Location, Enrollment, Student, StudentClass
-from run import run_swarm
+from run import run_swarm, stream_swarm, preload_department_courses, AGENT_DEPARTMENTS
+from agent_context import prompt_token_stats
+from profiles import (
+    load_profile_lists, sync_completed_courses, sync_sports, public_student, academic_levels, DEFAULT_ACADEMIC_LEVEL,
+)
+from schema import ensure_schema
+from catalog import (
+    CatalogQueryError, CourseNotFoundError, CatalogVersionWatcher, query_courses, get_catalog_version,
+    get_course_details, extract_section_codes, find_sections_by_code, MAX_PAGE_SIZE,
+)
+from response_cache import CatalogResponseCache
+from search import search_courses, DEFAULT_SEARCH_LIMIT
+from jobs import ScheduleJobQueue, JobQueueError, DONE
+from schedule_cache import ScheduleResultCache, schedule_cache_key
+from solver import ScheduleSolver, format_candidates
+from passwords import password_hasher, PasswordHasherBusy
+from json_provider import init_json
+from compression import init_compression
+from metrics import REGISTRY, endpoint_latency, init_latency_metrics, init_query_metrics
+from enrollment import SeatCache, EnrollmentError, CLOSED_STATUSES, enroll, drop, student_enrollments
 
 # Configuration
-DATABASE_URL = "sqlite:///WPI_COURSES.db"
 SECRET_KEY = "YOUR_SECRET_KEY"
+SCHEDULE_MODEL = os.getenv("SCHEDULE_MODEL", "gpt-4o")
 
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = SECRET_KEY
@@ -23,46 +42,81 @@ app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 # JWT setup
 jwt = JWTManager(app)
 
+# orjson encoding when it is installed, see json_provider.py
+init_json(app)
+
 # Loose CORS for testing
 CORS(app, resources={r"*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
 
-# Database setup
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = scoped_session(sessionmaker(bind=engine))
+# Per-endpoint latency for /api/internal/latency, and the Prometheus metrics on /metrics
+init_latency_metrics(app)
+init_query_metrics(engine, "primary")
+if read_engine is not engine:
+    init_query_metrics(read_engine, "read")
+
+# gzip / brotli for large responses. after_request hooks run last-registered first, so this one runs
+# before the latency hook above and compression counts towards the request's time.
+init_compression(app)
+
+# Database setup (engine and the session factories are shared with the Swarm agents, see db.py).
+# Handlers use the request's sessions from get_db() / get_read_db() and leave closing them to the
+# teardown hook; caches and background jobs open their own from the session factories.
+# Catalog reads use the read engine, which is a read-only connection when DB_READ_ONLY_CATALOG=1.
+init_request_sessions(app)
+ensure_schema(engine)
+preload_department_courses()
+
+def read_catalog_version():
+    """
+    Reads the catalog version with a short-lived session, for the response cache.
+    """
+    db = ReadSessionFactory()
+    try:
+        return get_catalog_version(db)
+    finally:
+        db.close()
+
+# Serialized /api/courses responses, invalidated whenever the catalog loader commits
+course_response_cache = CatalogResponseCache(read_catalog_version)
+
+# Live seat counts per section, dropped from the cache whenever this process enrolls or drops there
+seat_cache = SeatCache(ReadSessionFactory)
 
 # Register a new user into the db
 @app.route('/api/register', methods=['POST'])
 def register():
     """
-    Input: { "name": "" "email": "" "password": "" }
+    Input: { "name": "" "email": "" "password": "" "academicLevel": "" (optional, see /api/academic-levels) }
     Returns JWT access token if successful.
     """
-    db = SessionLocal()
+    db = get_db()
     data = request.get_json()
     name = data.get("name")
     email = data.get("email")
     password = data.get("password")
+    academic_level = data.get("academicLevel") or None
 
     if not all([name, email, password]):
-        db.close()
         return jsonify({"message": "Missing fields"}), 400
+    if academic_level is not None and academic_level not in academic_levels(db):
+        return jsonify({"message": f"Unknown academic level '{academic_level}'"}), 400
 
     # Check if user already exists
     existing_user = db.query(Student).filter_by(email=email).first()
     if existing_user:
-        db.close()
         return jsonify({"message": "User already exists"}), 409
 
-    # Hash the password
-    salt = bcrypt.gensalt()
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    # Hash the password on the hashing pool
+    try:
+        password_hash = password_hasher.hash(password)
+    except PasswordHasherBusy as e:
+        return jsonify({"message": str(e)}), e.status_code
 
     new_student = Student(
         name=name,
         email=email,
         password_hash=password_hash,
-        completed_courses=json.dumps([]),
-        sports=json.dumps([]),
+        academic_level=academic_level,
         future_goals=""
     )
     db.add(new_student)
@@ -71,7 +125,6 @@ def register():
     # Retrieve the new student
     student = db.query(Student).filter_by(email=email).first()
     if not student:
-        db.close()
         return jsonify({"message": "User not found"}), 404
 
     # Generate JWT Access Token
@@ -81,11 +134,7 @@ def register():
     return jsonify({
         "message": "Registration successful",
         "access_token": access_token,
-        "user": {
-            "id": new_student.id,
-            "name": new_student.name,
-            "email": new_student.email
-        }
+        "user": public_student(new_student)
     }), 201
 
 # Login a user and set their JWT identity
@@ -96,73 +145,169 @@ def login():
     Returns JWT access token if successful.
     """
 
-    db = SessionLocal()
+    db = get_db()
     data = request.get_json()
     email = data.get("email")
     password = data.get("password")
 
     if not all([email, password]):
-        db.close()
         return jsonify({"message": "Missing email or password"}), 400
 
     # Check if user exists
     student = db.query(Student).filter_by(email=email).first()
     if not student:
-        db.close()
         return jsonify({"message": "User not found"}), 404
 
-    # Check password
-    if not bcrypt.checkpw(password.encode('utf-8'), student.password_hash.encode('utf-8')):
-        db.close()
+    # Check password on the hashing pool
+    try:
+        matches, new_hash = password_hasher.check(password, student.password_hash)
+    except PasswordHasherBusy as e:
+        return jsonify({"message": str(e)}), e.status_code
+    if not matches:
         return jsonify({"message": "Invalid password"}), 401
 
+    # The hash was made at an older BCRYPT_ROUNDS, store the one made at the current cost
+    if new_hash:
+        student.password_hash = new_hash
+        db.commit()
+
     # Generate JWT Access Token
     access_token = create_access_token(identity=str(student.id))
 
-    db.close()
     return jsonify({
         "message": "Login successful",
         "access_token": access_token,
-        "user": {
-            "id": student.id,
-            "name": student.name,
-            "email": student.email,
-        }
+        "user": public_student(student)
     }), 200
 
-# Return all courses in the system
+# Return a page of courses in the system
 @app.route('/api/courses', methods=['GET'])
 def get_courses():
     """
-    Returns all courses in the system.
-    """
-
-    db = SessionLocal()
-    all_courses = db.query(Course).all()
-    results = []
-    # Append all fields for each course
-    for c in all_courses:
-        results.append({
-            "id": c.id,
-            "course_section": c.course_section,
-            "course_title": c.course_title,
-            "subject": c.subject,
-            "course_description": c.course_description,
-            "credits": c.credits,
-            "academic_level": c.academic_level,
-            "offering_period": c.offering_period,
-            "start_date": c.start_date.isoformat() if c.start_date else None,
-            "end_date": c.end_date.isoformat() if c.end_date else None,
-            "instructional_format": c.instructional_format,
-            "delivery_mode": c.delivery_mode,
-            "course_tags": c.course_tags,
-            "academic_units": c.academic_units,
-            "section_status": c.section_status,
-            "waitlist_capacity": c.waitlist_capacity,
-            "enrolled_capacity": c.enrolled_capacity,
-        })
-    db.close()
-    return jsonify({"courses": results}), 200
+    Returns a page of courses, ordered by id.
+    Query params: limit, cursor (from next_cursor), fields (comma separated),
+    include (instructors,locations), subject, academic_level, offering_period, delivery_mode,
+    section_status, department, exclude_completed (1 to hide the logged in student's completed courses)
+    Responses are cached per catalog version and support If-None-Match, except exclude_completed
+    ones, which depend on the student.
+    """
+    if request.args.get("exclude_completed") == "1":
+        verify_jwt_in_request()
+        # The primary, not the catalog reader: this joins against the student's own rows
+        try:
+            results, next_cursor = query_courses(get_db(), request.args, student_id=int(get_jwt_identity()))
+        except CatalogQueryError as e:
+            return jsonify({"message": str(e)}), 400
+        return jsonify({"courses": results, "next_cursor": next_cursor}), 200
+
+    def build_page():
+        results, next_cursor = query_courses(get_read_db(), request.args)
+        return {"courses": results, "next_cursor": next_cursor}
+
+    try:
+        cached = course_response_cache.get_or_build(request.args, build_page)
+    except CatalogQueryError as e:
+        return jsonify({"message": str(e)}), 400
+    return cached.to_response(request)
+
+# Return one course with its department, instructors and locations
+@app.route('/api/courses/<int:course_id>', methods=['GET'])
+def get_course(course_id):
+    """
+    Returns every course field plus department, instructors and locations, loaded in a fixed number of queries.
+    Cached per catalog version like /api/courses.
+    """
+
+    def build_course():
+        courses = get_course_details(get_read_db(), [course_id])
+        if not courses:
+            raise CourseNotFoundError(course_id)
+        return {"course": courses[0]}
+
+    try:
+        cached = course_response_cache.get_or_build(request.args, build_course, namespace=("course", course_id))
+    except CourseNotFoundError:
+        return jsonify({"message": "Course not found"}), 404
+    return cached.to_response(request)
+
+# Live seat counts, from the in-process seat cache
+@app.route('/api/courses/seats', methods=['GET'])
+def get_course_seats():
+    """
+    Query params: ids (comma separated course ids, at most MAX_PAGE_SIZE)
+    Returns {"seats": [...]} with enrolled and waitlisted counts, capacities and what is left.
+    Not cached per catalog version, since seats change with every enrollment.
+    """
+    try:
+        course_ids = [int(value) for value in request.args.get("ids", "").split(",") if value.strip()]
+    except ValueError:
+        return jsonify({"message": "ids must be comma separated integers"}), 400
+    if not course_ids or len(course_ids) > MAX_PAGE_SIZE:
+        return jsonify({"message": f"Pass between 1 and {MAX_PAGE_SIZE} ids"}), 400
+
+    seats = seat_cache.get_many(course_ids)
+    return jsonify({"seats": [seats[course_id] for course_id in course_ids if course_id in seats]}), 200
+
+# Enroll in a section, or join its waitlist when it is full
+@app.route('/api/courses/<int:course_id>/enrollment', methods=['POST'])
+@jwt_required()
+def enroll_in_course(course_id):
+    """
+    Returns {"status": "enrolled" | "waitlisted", "seats": {...}}, 409 if the student already holds a spot
+    or the section and its waitlist are full.
+    """
+    try:
+        status = enroll(get_db(), int(get_jwt_identity()), course_id)
+    except CourseNotFoundError:
+        return jsonify({"message": "Course not found"}), 404
+    except EnrollmentError as e:
+        return jsonify({"message": str(e)}), e.status_code
+
+    seat_cache.invalidate(course_id)
+    return jsonify({"status": status, "seats": seat_cache.get(course_id)}), 201
+
+# Drop a section or leave its waitlist
+@app.route('/api/courses/<int:course_id>/enrollment', methods=['DELETE'])
+@jwt_required()
+def drop_course(course_id):
+    """
+    Returns {"dropped": "enrolled" | "waitlisted", "seats": {...}}. A dropped seat goes to the first waitlisted student.
+    """
+    try:
+        dropped = drop(get_db(), int(get_jwt_identity()), course_id)
+    except EnrollmentError as e:
+        return jsonify({"message": str(e)}), e.status_code
+
+    seat_cache.invalidate(course_id)
+    return jsonify({"dropped": dropped, "seats": seat_cache.get(course_id)}), 200
+
+# The logged in student's enrollments and waitlist spots
+@app.route('/api/enrollments', methods=['GET'])
+@jwt_required()
+def get_enrollments():
+    enrollments = student_enrollments(get_db(), int(get_jwt_identity()))
+    return jsonify({"enrollments": enrollments}), 200
+
+# The academic levels a profile can pick from
+@app.route('/api/academic-levels', methods=['GET'])
+def get_academic_levels():
+    return jsonify({"academic_levels": academic_levels(get_read_db()), "default": DEFAULT_ACADEMIC_LEVEL}), 200
+
+# Full-text search over the course catalog
+@app.route('/api/courses/search', methods=['GET'])
+def search_course_catalog():
+    """
+    Query params: q, limit, offset
+    Returns ranked courses with a highlighted snippet of the best matching field.
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_SEARCH_LIMIT))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"message": "limit and offset must be integers"}), 400
+
+    results, next_offset = search_courses(get_read_db(), request.args.get("q", ""), limit, offset)
+    return jsonify({"courses": results, "next_offset": next_offset}), 200
 
 # Returns the user's profile information
 @app.route('/api/get-profile', methods=['GET'])
@@ -172,27 +317,26 @@ def get_profile():
     Retrieves the user's profile information.
     """
     
-    db = SessionLocal()
+    db = get_db()
 
     # Retrieve current user ID from JWT
     user_id = get_jwt_identity()
     current_user = db.query(Student).filter_by(id=user_id).first()
 
     if not current_user:
-        db.close()
         return jsonify({"message": "User not found"}), 404
 
+    completed_courses, sports = load_profile_lists(db, current_user.id)
+
     # Prepare user data
     user_data = {
-        "id": current_user.id,
-        "name": current_user.name,
-        "email": current_user.email,
-        "completedCourses": json.loads(current_user.completed_courses) if current_user.completed_courses else [],
-        "sports": json.loads(current_user.sports) if current_user.sports else [],
-        "futureGoals": current_user.future_goals
+        **public_student(current_user),
+        "completedCourses": completed_courses,
+        "sports": sports,
+        "futureGoals": current_user.future_goals,
+        "academicLevel": current_user.academic_level,
     }
 
-    db.close()
     return jsonify({"user": user_data}), 200
 
 # Updates the student's profile data
@@ -203,7 +347,7 @@ def update_profile():
     Updates the student's profile data
     """
 
-    db = SessionLocal()
+    db = get_db()
     data = request.get_json()
 
     # Retrieve current user ID from JWT
@@ -211,9 +355,12 @@ def update_profile():
     current_user = db.query(Student).filter_by(id=user_id).first()
 
     if not current_user:
-        db.close()
         return jsonify({"message": "User not found"}), 404
 
+    academic_level = data.get("academicLevel", current_user.academic_level) or None
+    if academic_level not in (None, current_user.academic_level) and academic_level not in academic_levels(db):
+        return jsonify({"message": f"Unknown academic level '{academic_level}'"}), 400
+
     # Update the user's profile data
     completed = data.get("completedCourses", [])
     sports = data.get("sports", [])
@@ -221,29 +368,38 @@ def update_profile():
     name = data.get("name", current_user.name)
     email = data.get("email", current_user.email)
 
-    # Update the user's profile
-    current_user.completed_courses = json.dumps(completed)
-    current_user.sports = json.dumps(sports)
+    # Update the user's profile, only touching the course and sport rows that changed
+    sync_completed_courses(db, current_user.id, completed)
+    sync_sports(db, current_user.id, sports)
     current_user.future_goals = goals
+    current_user.academic_level = academic_level
     current_user.name = name
     current_user.email = email
 
     db.commit()
-    db.close()
 
     return jsonify({"message": "Profile updated successfully"}), 200
 
-# Returns a new valid schedule for the user
-@app.route("/api/generate-schedule", methods=["POST"])
-@jwt_required()
-def generate_schedule():
+# Conflict-free candidate schedules, computed before the LLM is involved
+schedule_solver = ScheduleSolver(ReadSessionFactory)
+
+def solve_schedule(user_data):
     """
-    Runs Swarm to build a schedule, parses the recommendations into JSON and returns it
+    Runs the deterministic solver for the given userData. Returns a list of candidate schedules, best first.
     """
+    return schedule_solver.solve(
+        completed_courses=user_data.get("completedCourses", []),
+        sports=user_data.get("sports", []),
+        future_goals=user_data.get("futureGoals", ""),
+        department_names=AGENT_DEPARTMENTS,
+        academic_level=user_data.get("academicLevel"),
+    )
 
-    # Parse the incoming JSON payload
-    data = request.get_json() or {}
-    user_data = data.get("userData", {})
+def schedule_context(user_data):
+    """
+    Runs the solver and builds the Swarm context for the given userData.
+    Returns (context_variables, candidates).
+    """
 
     # Extract fields from user_data
     completed_courses = user_data.get("completedCourses", [])
@@ -252,11 +408,9 @@ def generate_schedule():
 
     # department_names = [d.name for d in departments]
     # Only these for now
-    department_names = [
-        "Computer Science Department",
-        "Robotics Engineering Department",
-        "Humanities and Arts Department",
-    ]
+    department_names = AGENT_DEPARTMENTS
+
+    candidates = solve_schedule(user_data)
 
     # Prepare context for the Swarm
     context_variables = {
@@ -264,27 +418,321 @@ def generate_schedule():
         "sports": sports,
         "futureGoals": future_goals,
         "departmentNames": department_names,
+        "academicLevel": user_data.get("academicLevel"),
+        "candidateSchedules": format_candidates(candidates),
     }
+    return context_variables, candidates
+
+def schedule_user_data(data):
+    """
+    The request's userData with academicLevel taken from the student's profile, DEFAULT_ACADEMIC_LEVEL
+    when the student hasn't picked one.
+    """
+    user_id = int(get_jwt_identity())
+    academic_level = get_read_db().query(Student.academic_level).filter_by(id=user_id).scalar()
+    return {**(data.get("userData") or {}), "academicLevel": academic_level or DEFAULT_ACADEMIC_LEVEL}
+
+def structure_schedule(final_text, candidates):
+    """
+    Turns the model's final text into the schedule payload. Section codes mentioned in the text
+    are validated against the courses table with one batched query.
+    Runs on job worker threads and inside streaming responses, so it opens its own session.
+    """
+    db = ReadSessionFactory()
+    try:
+        sections, unknown_sections = find_sections_by_code(db, extract_section_codes(final_text))
+    finally:
+        db.close()
+
+    return {
+        "recommendations": final_text.splitlines(),
+        "sections": sections,
+        "unknown_sections": unknown_sections,
+        "candidates": candidates,
+    }
+
+def build_schedule(user_data):
+    """
+    Runs Swarm to build a schedule for the given userData and parses the recommendations into JSON.
+    The solver's candidates are handed to Swarm so the model only has to pick and explain one.
+    Runs on the schedule job queue's worker threads.
+    """
+    context_variables, candidates = schedule_context(user_data)
 
     # Run the Swarm
     final_text = run_swarm(
-        model_override="gpt-4o", # can't use 4o idk
+        model_override=SCHEDULE_MODEL,
         messages=[{"role": "user", "content": "Generate a schedule."}],
         context_variables=context_variables,
     )
 
-    # Parse final_text into something structured
-    schedule_obj = {
-        "recommendations": final_text.splitlines()
-    }
+    return structure_schedule(final_text, candidates)
+
+def stream_build_schedule(user_data, publish):
+    """
+    build_schedule for streaming clients: publishes the solver's candidates, then agent handoffs and
+    tokens as the model generates text. Runs on the schedule job queue's worker threads.
+    """
+    context_variables, candidates = schedule_context(user_data)
+    publish("candidates", candidates)
+
+    final_text = ""
+    for event in stream_swarm(
+        model_override=SCHEDULE_MODEL,
+        messages=[{"role": "user", "content": "Generate a schedule."}],
+        context_variables=context_variables,
+    ):
+        if event["type"] == "done":
+            final_text = event["content"] or ""
+        else:
+            publish(event["type"], event)
+
+    return structure_schedule(final_text, candidates)
+
+# Generated schedules, memoized by normalized student context
+schedule_cache = ScheduleResultCache(
+    SessionFactory,
+    ttl=int(os.getenv("SCHEDULE_CACHE_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("SCHEDULE_CACHE_MAX_ENTRIES", "5000")),
+)
+schedule_catalog_version = CatalogVersionWatcher(read_catalog_version)
+
+def cached_schedule_with_seats(cache_key):
+    """
+    The cached schedule for cache_key, unless one of its sections has filled up or closed since it
+    was generated (enrollments don't change the catalog version, so the cache key can't see them).
+    """
+    schedule = schedule_cache.get(cache_key)
+    if schedule is None:
+        return None
+    seats = seat_cache.get_many([section["id"] for section in schedule.get("sections", [])])
+    for section_seats in seats.values():
+        if section_seats["section_status"] in CLOSED_STATUSES or section_seats["seats_left"] == 0:
+            return None
+    return schedule
+
+def run_schedule_job(payload, publish):
+    """
+    Job queue worker: builds the schedule and memoizes it under the request's cache key.
+    Jobs submitted by the streaming endpoint publish their progress as they go.
+    """
+    if payload.get("stream"):
+        schedule = stream_build_schedule(payload["userData"], publish)
+    else:
+        schedule = build_schedule(payload["userData"])
+    schedule_cache.put(payload["cacheKey"], schedule, SCHEDULE_MODEL, payload["catalogVersion"])
+    return schedule
+
+# Schedule generation runs in the background so LLM calls don't tie up request threads
+schedule_jobs = ScheduleJobQueue(
+    run_schedule_job,
+    max_workers=int(os.getenv("SCHEDULE_WORKERS", "4")),
+    max_queue_depth=int(os.getenv("SCHEDULE_QUEUE_DEPTH", "100")),
+    max_jobs_per_user=int(os.getenv("SCHEDULE_JOBS_PER_USER", "1")),
+)
+
+# Queues a new schedule for the user
+@app.route("/api/generate-schedule", methods=["POST"])
+@jwt_required()
+def generate_schedule():
+    """
+    Returns 200 with the schedule if an identical request was answered recently, otherwise queues
+    a Swarm run and returns 202 with a job id; poll /api/schedules/<job_id> for the result.
+    Pass ?fresh=1 to skip the cache, or ?mode=solver to get the solver's candidate schedules
+    straight away without running the LLM.
+    """
+
+    # Parse the incoming JSON payload
+    data = request.get_json() or {}
+    user_data = schedule_user_data(data)
+
+    if request.args.get("mode") == "solver":
+        return jsonify({
+            "message": "Schedule generated",
+            "schedule": {"candidates": solve_schedule(user_data)},
+        }), 200
+
+    catalog_version = schedule_catalog_version.current()
+    cache_key = schedule_cache_key(user_data, AGENT_DEPARTMENTS, SCHEDULE_MODEL, catalog_version)
+    if request.args.get("fresh") != "1":
+        cached_schedule = cached_schedule_with_seats(cache_key)
+        if cached_schedule is not None:
+            return jsonify({
+                "message": "Schedule generated",
+                "schedule": cached_schedule,
+                "cached": True,
+            }), 200
+
+    try:
+        job = schedule_jobs.submit(get_jwt_identity(), {
+            "userData": user_data,
+            "cacheKey": cache_key,
+            "catalogVersion": catalog_version,
+        })
+    except JobQueueError as e:
+        return jsonify({"message": str(e)}), e.status_code
 
-    # Return the response
     return jsonify({
-        "message": "Schedule generated",
-        "schedule": schedule_obj
-    }), 200
+        "message": "Schedule queued",
+        "job_id": job.id,
+        "status_url": f"/api/schedules/{job.id}",
+    }), 202
+
+def sse_event(event, data):
+    """
+    Formats one server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Seconds between keep-alive comments while a streamed job is queued or quiet
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+def sse_response(events):
+    """
+    A text/event-stream response that proxies won't buffer or cache.
+    """
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+def job_events(job):
+    """
+    Relays a schedule job's published events as server-sent events, then done or error once it finishes.
+    """
+    yield sse_event("queued", {"job_id": job.id, "status_url": f"/api/schedules/{job.id}"})
+    position = 0
+    while True:
+        events, finished = job.wait_events(position, timeout=SSE_KEEPALIVE_SECONDS)
+        for event, data in events:
+            yield sse_event(event, data)
+        position += len(events)
+        if finished:
+            break
+        if not events:
+            yield ": keepalive\n\n"
+
+    if job.status == DONE:
+        yield sse_event("done", {"message": "Schedule generated", "schedule": job.result})
+    else:
+        yield sse_event("error", {"message": job.error})
+
+# Streams a new schedule to the user as it is generated
+@app.route("/api/generate-schedule/stream", methods=["POST"])
+@jwt_required()
+def stream_schedule():
+    """
+    Same input as /api/generate-schedule, answered as server-sent events:
+    queued (with the job id), candidates (solver output), agent (handoffs), token (model text as it
+    is generated), then done with the structured schedule, or error.
+    The Swarm run is a schedule job, so the queue depth and per-user limits apply (503 / 429).
+    A client that disconnects leaves the job running; its result stays at /api/schedules/<job_id>.
+    Cached schedules are sent as a single done event unless ?fresh=1 is passed.
+    """
+    data = request.get_json() or {}
+    user_data = schedule_user_data(data)
+
+    catalog_version = schedule_catalog_version.current()
+    cache_key = schedule_cache_key(user_data, AGENT_DEPARTMENTS, SCHEDULE_MODEL, catalog_version)
+    if request.args.get("fresh") != "1":
+        cached_schedule = cached_schedule_with_seats(cache_key)
+        if cached_schedule is not None:
+            return sse_response([sse_event("done", {"message": "Schedule generated", "schedule": cached_schedule, "cached": True})])
+
+    try:
+        job = schedule_jobs.submit(get_jwt_identity(), {
+            "userData": user_data,
+            "cacheKey": cache_key,
+            "catalogVersion": catalog_version,
+            "stream": True,
+        })
+    except JobQueueError as e:
+        return jsonify({"message": str(e)}), e.status_code
+
+    return sse_response(job_events(job))
+
+# Returns the status of a schedule job, and the schedule once it is done
+@app.route("/api/schedules/<job_id>", methods=["GET"])
+@jwt_required()
+def get_schedule_job(job_id):
+    """
+    Returns the job status: queued (with queue_position), running, done (with the schedule) or failed.
+    """
+    job, status = schedule_jobs.get(job_id)
+    if not job or job.user_id != get_jwt_identity():
+        return jsonify({"message": "Schedule job not found"}), 404
+
+    if job.status == DONE:
+        status["schedule"] = status.pop("result")
+    return jsonify(status), 200
+
+# Queue depth and job counters for the schedule workers
+@app.route("/api/internal/schedule-queue", methods=["GET"])
+def schedule_queue_metrics():
+    """
+    Returns schedule job queue metrics.
+    """
+    return jsonify(schedule_jobs.metrics()), 200
+
+@app.route("/api/internal/prompt-tokens", methods=["GET"])
+def prompt_token_metrics():
+    """
+    Returns estimated prompt tokens per schedule request, next to what the unfiltered tool results would have cost.
+    """
+    return jsonify(prompt_token_stats.snapshot()), 200
+
+@app.route("/api/internal/latency", methods=["GET"])
+def latency_metrics():
+    """
+    Returns request counts and latency percentiles per endpoint, plus password hashing pool counters.
+    """
+    return jsonify({"endpoints": endpoint_latency.snapshot(), "password_hashing": password_hasher.metrics()}), 200
+
+@app.route("/api/internal/db-pool", methods=["GET"])
+def db_pool_metrics():
+    """
+    Returns connection pool usage (checked out, overflow, checkout wait times) for the primary and read engines.
+    """
+    metrics = {"primary": pool_metrics(engine)}
+    if read_engine is not engine:
+        metrics["read"] = pool_metrics(read_engine)
+    return jsonify(metrics), 200
+
+def collect_runtime_metrics():
+    """
+    Gauges read at scrape time from the pools, the schedule queue and the password hasher.
+    """
+    engines = {"primary": engine} if read_engine is engine else {"primary": engine, "read": read_engine}
+    pools = {name: pool_metrics(bound) for name, bound in engines.items()}
+    queue = schedule_jobs.metrics()
+    hashing = password_hasher.metrics()
+    return [
+        ("db_pool_checked_out", "gauge", "Connections checked out of the pool.",
+         [({"engine": name}, pool.get("checked_out", 0)) for name, pool in pools.items()]),
+        ("db_pool_overflow", "gauge", "Connections open beyond the pool size.",
+         [({"engine": name}, pool.get("overflow", 0)) for name, pool in pools.items()]),
+        ("db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up waiting for a connection.",
+         [({"engine": name}, pool.get("timeouts", 0)) for name, pool in pools.items()]),
+        ("schedule_queue_depth", "gauge", "Schedule jobs waiting for a worker.", [({}, queue["queue_depth"])]),
+        ("schedule_jobs_running", "gauge", "Schedule jobs running.", [({}, queue["running"])]),
+        ("password_hashes_rejected_total", "counter", "Sign-ins turned away because the hashing pool was full.",
+         [({}, hashing["rejected"])]),
+    ]
+
+REGISTRY.add_collector(collect_runtime_metrics)
+
+# Prometheus scrape endpoint
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Route latency histograms, SQL statement counts and durations, model completions and tokens,
+    agent tool calls and handoffs, Swarm run totals, and pool / queue gauges, in Prometheus text format.
+    """
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Run the app
 if __name__ == '__main__':
+    # Fork the password hashing processes before the server starts its request threads (see passwords.py)
+    password_hasher.start()
     app.run(host='0.0.0.0', debug=True)
@@ -0,0 +1,59 @@
+import sys
+import time
+import random
+from bs4 import BeautifulSoup
+from fill_db import chunked, CHUNK_SIZE
+from description_cleaner import CLEAN_WORKERS, iter_cleaned_chunks
+
+# Benchmark for the description cleaning stage of fill_db.py
+# Usage: python bench_clean.py [entries]
+
+WORDS = "the of design systems analysis students will study algorithms theory project data robots".split()
+
+
+def synthetic_description(rng):
+    """
+    Builds a Workday-style description. Roughly a quarter have no markup, like the real export.
+    """
+    lines = [" ".join(rng.choices(WORDS, k=rng.randint(8, 16))) for _ in range(rng.randint(2, 8))]
+    if rng.random() < 0.25:
+        return " ".join(lines)
+    return "<p>Cat. I<br />" + "<br />".join(lines) + " &amp; more.</p>"
+
+
+def baseline(entries):
+    """
+    The original per-entry BeautifulSoup cleaning.
+    """
+    return [
+        BeautifulSoup(entry["Course_Description"], "html.parser").get_text(separator="\n").strip()
+        for entry in entries
+    ]
+
+
+def pipeline(entries, workers):
+    """
+    The chunked process pool stage used by fill_db.py.
+    """
+    cleaned = []
+    for _, descriptions in iter_cleaned_chunks(chunked(entries, CHUNK_SIZE), workers):
+        cleaned.extend(descriptions)
+    return cleaned
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(0)
+    entries = [{"Course_Description": synthetic_description(rng)} for _ in range(count)]
+
+    start = time.perf_counter()
+    expected = baseline(entries)
+    baseline_time = time.perf_counter() - start
+    print(f"baseline        {count} entries in {baseline_time:.2f}s")
+
+    for workers in sorted({1, CLEAN_WORKERS}):
+        start = time.perf_counter()
+        cleaned = pipeline(entries, workers)
+        elapsed = time.perf_counter() - start
+        assert cleaned == expected, "cleaned descriptions differ from the BeautifulSoup baseline"
+        print(f"pipeline x{workers:<4}  {count} entries in {elapsed:.2f}s ({baseline_time / elapsed:.1f}x, output identical)")
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+from fake_llm_server import start_fake_llm_server
+
+# Benchmark for the per-request model client setup in run.py, against fake_llm_server.py
+# Usage: python bench_client.py [requests]
+
+MESSAGES = [{"role": "user", "content": "Build me a schedule"}]
+
+
+def timed_requests(get_client, count):
+    """
+    Sends count chat completions, calling get_client() before each one. Returns per-request seconds.
+    """
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client = get_client()
+        client.chat.completions.create(model="fake", messages=MESSAGES)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    ordered = sorted(timings)
+    mean = sum(timings) / len(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<24} first {timings[0] * 1000:7.2f}ms  mean {mean * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server, base_url = start_fake_llm_server()
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    # Imported after the environment points at the fake server
+    from llm_client import create_openai_client, get_openai_client
+
+    start = time.perf_counter()
+    get_openai_client()
+    print(f"shared client cold start  {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    report("new client per request", timed_requests(create_openai_client, count))
+    report("shared client", timed_requests(get_openai_client, count))
+    server.shutdown()
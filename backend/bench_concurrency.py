@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+from sqlalchemy import create_engine, select, update, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models import Course, Student
+from catalog import query_courses
+from profiles import sync_sports
+from db import DATABASE_URL, create_db_engine
+
+# Concurrency benchmark: N catalog readers and M profile writers against a copy of the database,
+# first with the old engine setup (rollback journal, default pool) and then with create_db_engine.
+# Usage: python bench_concurrency.py [readers] [writers] [seconds]
+
+SPORTS = ["Soccer", "Track", "Swimming", "Rowing", "Fencing"]
+
+
+def old_engine(path):
+    """
+    The engine app.py and run.py used to create, on a database in rollback journal mode.
+    """
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode = DELETE")
+    return engine
+
+
+def seed_students(engine, count):
+    with Session(engine) as session, session.begin():
+        result = session.execute(
+            insert(Student).returning(Student.id),
+            [{"name": f"bench{i}", "email": f"bench{i}-{time.time_ns()}@example.com", "password_hash": "x"} for i in range(count)],
+        )
+        return [row.id for row in result]
+
+
+def reader(engine, subjects, stop, stats):
+    rng = random.Random()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                query_courses(session, {"subject": rng.choice(subjects), "limit": "100", "include": "instructors"})
+        except OperationalError:
+            stats["read_errors"] += 1
+            continue
+        stats["reads"].append(time.perf_counter() - start)
+
+
+def writer(engine, student_id, stop, stats):
+    rng = random.Random(student_id)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as session, session.begin():
+                session.execute(update(Student).where(Student.id == student_id).values(future_goals=f"goal {rng.random()}"))
+                sync_sports(session, student_id, rng.sample(SPORTS, rng.randint(0, 3)))
+        except OperationalError:
+            stats["write_errors"] += 1
+            continue
+        stats["writes"].append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else float("nan")
+
+
+def run(label, engine, readers, writers, seconds):
+    with Session(engine) as session:
+        subjects = session.scalars(select(Course.subject).distinct()).all()
+    student_ids = seed_students(engine, writers)
+
+    stats = {"reads": [], "writes": [], "read_errors": 0, "write_errors": 0}
+    stop = threading.Event()
+    threads = [threading.Thread(target=reader, args=(engine, subjects, stop, stats)) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(engine, student_id, stop, stats)) for student_id in student_ids]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(
+        f"{label:<8} reads {len(stats['reads']) / seconds:8.1f}/s (p95 {percentile(stats['reads'], 0.95):7.1f}ms, "
+        f"{stats['read_errors']} errors)   writes {len(stats['writes']) / seconds:7.1f}/s "
+        f"(p95 {percentile(stats['writes'], 0.95):7.1f}ms, {stats['write_errors']} errors)"
+    )
+
+
+if __name__ == "__main__":
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    source = DATABASE_URL.replace("sqlite:///", "", 1)
+    print(f"{readers} readers, {writers} writers, {seconds:g}s each, on a copy of {source}")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        for label, make_engine in (("before", old_engine), ("after", lambda path: create_db_engine(f"sqlite:///{path}"))):
+            path = os.path.join(workdir, f"{label}.db")
+            # The backup API also copies commits still sitting in a -wal file
+            with sqlite3.connect(source) as src, sqlite3.connect(path) as dest:
+                src.backup(dest)
+            run(label, make_engine(path), readers, writers, seconds)
+    finally:
+        shutil.rmtree(workdir)
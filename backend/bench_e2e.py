@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+import threading
+import subprocess
+from fake_llm_server import start_fake_llm_server
+
+# End-to-end benchmark: seeds a synthetic catalog through fill_db.py into a scratch database, points
+# the app at fake_llm_server.py and drives register, login, course listing, profile updates and
+# schedule generation from concurrent client threads, one phase per endpoint. Reports throughput,
+# p50/p95/p99 and peak RSS per endpoint and writes them as JSON; pass --compare with an earlier
+# result file to see what moved.
+# Usage: python bench_e2e.py [--courses 5000] [--threads 8] [--llm-latency 0.3] [--compare old.json]
+
+DEPARTMENTS = {
+    "Computer Science Department": ("CS", "Computer Science"),
+    "Robotics Engineering Department": ("RBE", "Robotics Engineering"),
+    "Humanities and Arts Department": ("HI", "History"),
+    "Mathematical Sciences Department": ("MA", "Mathematical Sciences"),
+    "Physical Education and Athletics": ("PE", "Wellness and Physical Education"),
+}
+TOPICS = [
+    "Algorithms", "Machine Learning", "Databases", "Networks", "Operating Systems", "Computer Vision",
+    "Control Systems", "Embedded Design", "Kinematics", "Global History", "Ethics", "Linear Algebra",
+    "Probability", "Statistics", "Software Engineering", "Human-Robot Interaction", "Soccer", "Track",
+]
+LEVELS = ["Foundations of", "Applied", "Advanced", "Topics in", "Introduction To"]
+PERIODS = ["2025 Spring C Term", "2025 Spring D Term"]
+MEETINGS = [
+    "M-T-R-F | 9:00 AM - 9:50 AM", "M-T-R-F | 10:00 AM - 10:50 AM", "M-T-R-F | 11:00 AM - 11:50 AM",
+    "M-T-R-F | 1:00 PM - 1:50 PM", "T-F | 2:00 PM - 3:50 PM", "M-R | 3:00 PM - 4:50 PM",
+    "W | 9:00 AM - 11:50 AM", "R | 2:00 PM - 2:50 PM", "",
+]
+GOALS = [
+    "robots and AI", "building databases", "machine learning research", "history teacher",
+    "control systems for drones", "software engineering at a startup", "statistics and data",
+]
+PASSWORD = "correct horse"
+
+
+def synthetic_entries(count, seed=0):
+    """
+    Yields count Workday Report_Entry records shaped like courses.json, spread over the agent departments.
+    """
+    rng = random.Random(seed)
+    departments = list(DEPARTMENTS.items())
+    for number in range(count):
+        department, (prefix, subject) = departments[number % len(departments)]
+        topic = rng.choice(TOPICS)
+        title = f"{prefix} {1000 + number // 4:04d} - {rng.choice(LEVELS)} {topic}"
+        code, name = title.split(" - ", 1)
+        enrolled_limit = rng.choice([18, 25, 40, 60, 120])
+        enrolled = rng.randint(0, enrolled_limit)
+        period = rng.choice(PERIODS)
+        yield {
+            "Course_Section": f"{code}-{period[12]}{number % 4 + 1:02d} - {name}",
+            "Course_Title": title,
+            "Subject": subject,
+            "Course_Description": f"<p>Cat. I<br />A study of {topic.lower()} for students interested in "
+                                  f"{rng.choice(GOALS)}.<br />Recommended background: {prefix} {rng.randint(1000, 2999)}.</p>",
+            "Credits": "1" if prefix == "PE" else "3",
+            "Academic_Level": "Graduate" if rng.random() < 0.15 else "Undergraduate",
+            "Offering_Period": period,
+            "Course_Section_Start_Date": "2025-01-15" if period.endswith("C Term") else "2025-03-17",
+            "Course_Section_End_Date": "2025-03-07" if period.endswith("C Term") else "2025-05-02",
+            "Instructional_Format": rng.choice(["Lecture", "Lecture", "Laboratory", "Discussion", "Seminar"]),
+            "Delivery_Mode": "In-Person",
+            "Course_Tags": f"Degree Attribute :: {subject}",
+            "Academic_Units": department,
+            "Section_Status": "Open" if enrolled < enrolled_limit else "Closed",
+            "Waitlist_Waitlist_Capacity": f"0/{rng.choice([0, 10, 20])}",
+            "Enrolled_Capacity": f"{enrolled}/{enrolled_limit}",
+            "Meeting_Patterns": rng.choice(MEETINGS),
+            "Instructors": f"Instructor {rng.randint(1, count // 10 + 1)}",
+            "Locations": f"Hall {rng.randint(100, 400)}",
+        }
+
+
+def seed_catalog(courses):
+    """
+    Loads a synthetic catalog and its course index through the fill_db.py path. Needs DATABASE_URL
+    and COURSE_INDEX_PATH to point at the scratch directory already.
+    """
+    from db import create_db_engine
+    from schema import ensure_schema
+    from fill_db import load_catalog
+    from course_index import write_course_index
+
+    engine = create_db_engine(os.environ["DATABASE_URL"])
+    ensure_schema(engine)
+    start = time.perf_counter()
+    loaded, rows = load_catalog(engine, synthetic_entries(courses))
+    write_course_index(engine)
+    engine.dispose()
+    return loaded, rows, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 3) if values else None
+
+
+def run_phase(requests, threads, send):
+    """
+    Calls send(i) for i in range(requests) from threads client threads while sampling RSS.
+    send returns True when the response was what the endpoint should answer.
+    """
+    from metrics import rss_mb
+
+    numbers = itertools.count()
+    latencies = []
+    errors = [0]
+    peak_rss = [rss_mb()]
+    done = threading.Event()
+
+    def client():
+        while (i := next(numbers)) < requests:
+            start = time.perf_counter()
+            try:
+                ok = send(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors[0] += 1
+
+    def sample_rss():
+        while not done.wait(0.05):
+            peak_rss[0] = max(peak_rss[0], rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "peak_rss_mb": round(peak_rss[0], 1),
+    }
+
+
+def run_benchmark(args):
+    """
+    Runs every endpoint phase against the app. Returns {endpoint: stats}.
+    """
+    from app import app
+    from catalog import encode_cursor
+
+    client = app.test_client()
+    run_id = time.time_ns()
+    users = [{"name": f"bench {i}", "email": f"bench-{run_id}-{i}@example.com", "password": PASSWORD} for i in range(args.users)]
+    tokens = [None] * args.users
+    rng = random.Random(1)
+    subjects = [subject for _, subject in DEPARTMENTS.values()]
+    schedule_users = itertools.count()
+    schedule_user = threading.local()
+
+    def register(i):
+        response = client.post("/api/register", json=users[i])
+        tokens[i] = {"Authorization": f"Bearer {response.get_json().get('access_token')}"}
+        return response.status_code == 201
+
+    def login(i):
+        user = users[i % args.users]
+        return client.post("/api/login", json={"email": user["email"], "password": PASSWORD}).status_code == 200
+
+    def courses(i):
+        query = {"limit": rng.choice([20, 50, 100]), "cursor": encode_cursor(rng.randrange(0, max(args.courses - 100, 1)))}
+        if i % 3 == 0:
+            query["subject"] = rng.choice(subjects)
+        if i % 5 == 0:
+            query["include"] = "instructors,locations"
+        return client.get("/api/courses", query_string=query).status_code == 200
+
+    def update_account(i):
+        return client.post("/api/update-account", headers=tokens[i % args.users], json={
+            "completedCourses": rng.sample(["CS 1000", "CS 1001", "RBE 1002", "HI 1003", "MA 1004"], rng.randint(0, 3)),
+            "sports": rng.sample(["Soccer", "Track"], rng.randint(0, 2)),
+            "futureGoals": rng.choice(GOALS),
+        }).status_code == 200
+
+    def generate_schedule(i):
+        # Each client thread sticks to one user, so the one-job-per-user limit never rejects a request
+        if not hasattr(schedule_user, "index"):
+            schedule_user.index = next(schedule_users)
+        headers = tokens[schedule_user.index]
+        response = client.post("/api/generate-schedule?fresh=1", headers=headers, json={"userData": {
+            "completedCourses": [],
+            "sports": ["Soccer"] if i % 2 else [],
+            "futureGoals": f"{GOALS[i % len(GOALS)]} {i}",
+        }})
+        if response.status_code != 202:
+            return response.status_code == 200
+        status_url = response.get_json()["status_url"]
+        deadline = time.monotonic() + args.schedule_timeout
+        while time.monotonic() < deadline:
+            status = client.get(status_url, headers=headers).get_json()
+            if status["status"] in ("done", "failed"):
+                return status["status"] == "done"
+            time.sleep(0.01)
+        return False
+
+    results = {}
+    phases = [
+        ("register", register, args.users),
+        ("login", login, args.requests),
+        ("courses", courses, args.requests),
+        ("update-account", update_account, args.requests),
+        ("generate-schedule", generate_schedule, args.schedules),
+    ]
+    for name, send, requests in phases:
+        # The schedule phase needs a user per client thread, see generate_schedule
+        threads = min(args.threads, args.users) if name == "generate-schedule" else args.threads
+        results[name] = run_phase(requests, threads, send)
+        stats = results[name]
+        print(f"{name:<18} {stats['requests']:>6} req  {stats['errors']:>4} err  {stats['throughput_rps']:>8.1f} req/s  "
+              f"p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  "
+              f"rss {stats['peak_rss_mb']:7.1f}MB")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """
+    Prints the change in throughput and p95 per endpoint against an earlier result file.
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nagainst {baseline_path} ({baseline.get('commit') or 'unknown commit'})")
+    for name, stats in results.items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ("throughput_rps", "p95_ms", "peak_rss_mb"):
+            if before.get(key) and stats.get(key) is not None:
+                changes.append(f"{key} {(stats[key] - before[key]) / before[key]:+7.1%}")
+        print(f"{name:<18} " + "  ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end load test against a fake LLM backend")
+    parser.add_argument("--courses", type=int, default=5000, help="sections in the synthetic catalog")
+    parser.add_argument("--users", type=int, default=32, help="students registered in the first phase")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=400, help="requests per login, courses and update-account phase")
+    parser.add_argument("--schedules", type=int, default=32, help="schedules generated in the last phase")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds the fake LLM waits before answering")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10, help="password hashing cost for the run")
+    parser.add_argument("--schedule-timeout", type=float, default=120, help="seconds to wait for one schedule job")
+    parser.add_argument("--output", default="bench_e2e.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_e2e_")
+    server, base_url = start_fake_llm_server(latency=args.llm_latency)
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+        "COURSE_INDEX_PATH": os.path.join(scratch, "course_index"),
+        "OPENAI_BASE_URL": base_url,
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+    })
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    try:
+        # The app and fill_db.py are imported after the environment points at the scratch database
+        loaded, rows, seconds = seed_catalog(args.courses)
+        print(f"Seeded {loaded} sections ({rows} rows) in {seconds:.2f}s, fake LLM latency {args.llm_latency}s")
+
+        # Keep the per-request INFO logging from run.py out of the report
+        logging.basicConfig(level=logging.WARNING)
+        from passwords import password_hasher
+        try:
+            results = run_benchmark(args)
+        finally:
+            password_hasher.shutdown()
+    finally:
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "llm_requests": server.request_count,
+        "endpoints": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    sys.exit(1 if any(stats["errors"] for stats in results.values()) else 0)
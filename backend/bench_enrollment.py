@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.orm import Session
+from models import Course, Enrollment, Student
+from db import DATABASE_URL, create_db_engine
+from schema import ensure_schema
+from enrollment import EnrollmentError, ENROLLED, WAITLISTED, enroll, drop
+
+# Registration-day load test: hundreds of students enroll in one small section at once, then half
+# of them drop, all on a copy of the database. Fails if the section is ever overbooked or its
+# counters disagree with the enrollment rows.
+# Usage: python bench_enrollment.py [students] [threads] [seats] [waitlist]
+
+
+def setup(engine, students, seats, waitlist):
+    """
+    Empties a section down to the given capacities and adds the students. Returns (course_id, student ids).
+    """
+    with Session(engine) as session, session.begin():
+        course_id = session.scalar(select(Course.id).where(Course.section_status == "Open").order_by(Course.id).limit(1))
+        session.execute(update(Course).where(Course.id == course_id).values(
+            enrolled_count=0, enrolled_limit=seats, waitlist_count=0, waitlist_limit=waitlist,
+        ))
+        result = session.execute(
+            insert(Student).returning(Student.id),
+            [{"name": f"load{i}", "email": f"load{i}-{time.time_ns()}@example.com", "password_hash": "x"} for i in range(students)],
+        )
+        return course_id, [row.id for row in result]
+
+
+def attempt(engine, action, student_id, course_id):
+    start = time.perf_counter()
+    with Session(engine) as session:
+        try:
+            outcome = action(session, student_id, course_id)
+        except EnrollmentError as e:
+            outcome = str(e)
+    return outcome, time.perf_counter() - start
+
+
+def check(engine, course_id, seats, waitlist):
+    """
+    Returns a list of invariant violations for the section.
+    """
+    with Session(engine) as session:
+        course = session.get(Course, course_id)
+        held = Counter(dict(session.execute(
+            select(Enrollment.status, func.count()).where(Enrollment.course_id == course_id).group_by(Enrollment.status)
+        ).all()))
+    problems = []
+    if held[ENROLLED] > seats or held[WAITLISTED] > waitlist:
+        problems.append(f"overbooked: {held[ENROLLED]}/{seats} enrolled, {held[WAITLISTED]}/{waitlist} waitlisted")
+    if (course.enrolled_count, course.waitlist_count) != (held[ENROLLED], held[WAITLISTED]):
+        problems.append(
+            f"counters {course.enrolled_count}/{course.waitlist_count} don't match rows {held[ENROLLED]}/{held[WAITLISTED]}"
+        )
+    return problems
+
+
+def run_phase(label, engine, action, student_ids, course_id, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda student_id: attempt(engine, action, student_id, course_id), student_ids))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for _, latency in results)
+    outcomes = Counter(outcome for outcome, _ in results)
+    print(
+        f"{label:<7} {len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s, "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms): {dict(outcomes)}"
+    )
+
+
+if __name__ == "__main__":
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    seats = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    waitlist = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    source = DATABASE_URL.replace("sqlite:///", "", 1)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "enrollment.db")
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dest:
+            src.backup(dest)
+        engine = create_db_engine(f"sqlite:///{path}", pool_size=threads, max_overflow=0)
+        ensure_schema(engine)
+        course_id, student_ids = setup(engine, students, seats, waitlist)
+        print(f"{students} students, {threads} threads, section {course_id} with {seats} seats and {waitlist} waitlist spots")
+
+        run_phase("enroll", engine, enroll, student_ids, course_id, threads)
+        problems = check(engine, course_id, seats, waitlist)
+        run_phase("drop", engine, drop, student_ids[::2], course_id, threads)
+        problems += check(engine, course_id, seats, waitlist)
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir)
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if not problems:
+        print("ok   no overbooking, counters match the enrollment rows")
+    sys.exit(1 if problems else 0)
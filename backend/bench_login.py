@@ -0,0 +1,54 @@
+import sys
+import time
+import threading
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from passwords import PasswordHasher, PASSWORD_HASH_WORKERS, hash_password_now
+
+# Login burst benchmark: request threads checking passwords inline (the old login) versus handing
+# them to the hashing pool, while another thread keeps timing a cheap request to show how much
+# the burst delays everything else.
+# Usage: python bench_login.py [request threads] [logins] [rounds]
+
+
+def cheap_request_latency(stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        sum(range(2000))
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.005)
+
+
+def run(label, check, threads, logins, password_hash):
+    stop = threading.Event()
+    latencies = []
+    probe = threading.Thread(target=cheap_request_latency, args=(stop, latencies))
+    probe.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: check("correct horse", password_hash), range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    probe.join()
+    assert all(results)
+    latencies.sort()
+    print(
+        f"{label:<8} {logins / elapsed:7.1f} logins/s   other request p99 "
+        f"{latencies[int(len(latencies) * 0.99)] * 1000:7.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    password_hash = hash_password_now("correct horse", rounds)
+    print(f"{logins} logins from {threads} request threads at cost {rounds}, {PASSWORD_HASH_WORKERS} hashing processes")
+
+    run("inline", lambda password, stored: bcrypt.checkpw(password.encode(), stored.encode()), threads, logins, password_hash)
+    hasher = PasswordHasher(rounds=rounds, max_pending=threads)
+    hasher.start()
+    try:
+        run("pool", lambda password, stored: hasher.check(password, stored)[0], threads, logins, password_hash)
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,49 @@
+import sys
+import time
+import random
+from course_index import CourseEmbeddingIndex
+
+# Benchmark for goal-based retrieval over the course index
+# Usage: python bench_retrieval.py [sections]
+
+WORDS = (
+    "robotics machine learning design systems analysis algorithms theory data software engineering "
+    "history music theatre writing biology chemistry physics calculus statistics networks security "
+    "graphics vision control dynamics materials economics psychology philosophy ethics policy"
+).split()
+GOALS = [
+    "I want to build autonomous robots",
+    "machine learning and computer vision research",
+    "work in software engineering at a startup",
+    "study music and theatre production",
+    "biomedical data analysis",
+]
+
+
+def synthetic_rows(count, rng):
+    """
+    (id, department_id, title, tags, description) rows shaped like the real catalog.
+    """
+    for course_id in range(1, count + 1):
+        title = f"XX {1000 + course_id % 3000} - " + " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).title()
+        tags = "Offering Pattern :: Category I; " + " ".join(rng.choices(WORDS, k=2))
+        description = " ".join(rng.choices(WORDS, k=rng.randint(40, 120)))
+        yield course_id, course_id % 40 + 1, title, tags, description
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    departments = {f"Department {number}": number for number in range(1, 41)}
+
+    start = time.perf_counter()
+    index = CourseEmbeddingIndex.build(synthetic_rows(count, rng), departments, catalog_version=1)
+    print(f"build           {count} sections, {index.vectors.shape[1]} dims in {time.perf_counter() - start:.2f}s")
+
+    for label, department_names in (("top_k all", None), ("top_k 3 depts", ["Department 1", "Department 2", "Department 3"])):
+        index.top_k(GOALS[0], 20, department_names)
+        rounds = 200
+        start = time.perf_counter()
+        for round_number in range(rounds):
+            index.top_k(GOALS[round_number % len(GOALS)], 20, department_names)
+        print(f"{label:<15} {(time.perf_counter() - start) / rounds * 1000:.2f}ms per query")
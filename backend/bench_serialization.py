@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+
+# Serialization benchmark for /api/courses: CPU per page for building rows (the old ORM rows with a
+# date isoformat per field against query_courses), encoding (json against orjson), and whole requests
+# through the app per JSON provider and Content-Encoding, with the bytes each one puts on the wire.
+# Runs on a copy of the database.
+# Usage: python bench_serialization.py [requests per case]
+
+# The database to copy; db.py is only imported once DATABASE_URL points at the copy
+SOURCE_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///WPI_COURSES.db")
+PAGE_SIZES = (100, 500)
+INCLUDE = "instructors,locations"
+
+
+def cpu_ms(fn, count):
+    """
+    Process CPU time per call of fn, in ms, after one warm-up call. Returns (ms, last result).
+    """
+    result = fn()
+    start = time.process_time()
+    for _ in range(count):
+        result = fn()
+    return (time.process_time() - start) / count * 1000, result
+
+
+def legacy_page(db, limit):
+    """
+    How query_courses built a page before: ORM rows and a Python date round trip per date field.
+    """
+    from sqlalchemy import select
+    from models import Course
+    from catalog import COURSE_FIELDS, DATE_FIELDS, attach_related
+
+    fields = list(COURSE_FIELDS)
+    rows = db.execute(select(*COURSE_FIELDS.values()).order_by(Course.id).limit(limit + 1)).all()[:limit]
+    date_indexes = [index for index, field in enumerate(fields) if field in DATE_FIELDS]
+    results = []
+    for row in rows:
+        values = list(row)
+        for index in date_indexes:
+            values[index] = values[index].isoformat() if values[index] else None
+        results.append(dict(zip(fields, values)))
+    return attach_related(db, results, INCLUDE.split(","))
+
+
+def bench_build_and_encode(count):
+    from db import SessionFactory
+    from catalog import query_courses
+    from json_provider import orjson
+
+    db = SessionFactory()
+    try:
+        for limit in PAGE_SIZES:
+            args = {"limit": str(limit), "include": INCLUDE}
+            legacy_ms, legacy = cpu_ms(lambda: legacy_page(db, limit), count)
+            current_ms, page = cpu_ms(lambda: query_courses(db, args)[0], count)
+            assert page == legacy, "query_courses no longer matches the old rows"
+            print(f"build  {limit:>4} courses   old rows {legacy_ms:7.2f}ms   query_courses {current_ms:7.2f}ms")
+
+            payload = {"courses": page, "next_cursor": None}
+            json_ms, body = cpu_ms(lambda: json.dumps(payload, separators=(",", ":")).encode("utf-8"), count)
+            line = f"encode {limit:>4} courses   json {json_ms:7.2f}ms ({len(body):,} bytes)"
+            if orjson:
+                orjson_ms, body = cpu_ms(lambda: orjson.dumps(payload), count)
+                line += f"   orjson {orjson_ms:7.2f}ms ({len(body):,} bytes)"
+            print(line)
+    finally:
+        db.close()
+
+
+def bench_requests(count):
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+    from app import app, password_hasher
+    from json_provider import OrjsonProvider, orjson
+    from compression import ENCODINGS
+
+    client = app.test_client()
+    email = f"bench-serialization-{time.time_ns()}@example.com"
+    student_id = client.post("/api/register", json={"name": "bench", "email": email, "password": "bench"}).get_json()["user"]["id"]
+    with app.app_context():
+        token = create_access_token(identity=str(student_id))
+
+    providers = [("json", DefaultJSONProvider(app))] + ([("orjson", OrjsonProvider(app))] if orjson else [])
+    try:
+        for limit in PAGE_SIZES:
+            # exclude_completed pages are built and encoded per request; the others come from the response cache
+            for label, path in (
+                ("per request", f"/api/courses?limit={limit}&include={INCLUDE}&exclude_completed=1"),
+                ("cached", f"/api/courses?limit={limit}&include={INCLUDE}"),
+            ):
+                for provider_name, provider in providers:
+                    app.json = provider
+                    for encoding in ("identity",) + ENCODINGS:
+                        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": encoding}
+                        ms, response = cpu_ms(lambda: client.get(path, headers=headers), count)
+                        assert response.status_code == 200, response.status_code
+                        print(f"{label:<11} {limit:>4} courses  {provider_name:<6} {encoding:<8} "
+                              f"{ms:7.2f}ms CPU   {len(response.get_data()):>9,} bytes")
+    finally:
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    source = SOURCE_DATABASE_URL.replace("sqlite:///", "", 1)
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "bench.db")
+        # The backup API also copies commits still sitting in a -wal file
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dest:
+            src.backup(dest)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+        print(f"{count} runs per case on a copy of {source}")
+        bench_build_and_encode(count)
+        bench_requests(count)
+    finally:
+        shutil.rmtree(workdir)
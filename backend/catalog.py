@@ -0,0 +1,330 @@
+import re
+import time
+import base64
+import threading
+from datetime import datetime
+from operator import attrgetter
+from collections import defaultdict
+from sqlalchemy import select, update, insert, type_coerce, String
+from sqlalchemy.orm import selectinload, joinedload, raiseload
+from models import Course, Department, Instructor, Location, CatalogVersion
+from profiles import exclude_completed
+
+# Read helpers for the course catalog endpoints
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Public name -> column for every field /api/courses can return
+COURSE_FIELDS = {
+    "id": Course.id,
+    "course_section": Course.course_section,
+    "course_title": Course.course_title,
+    "subject": Course.subject,
+    "course_description": Course.course_description,
+    "credits": Course.credits,
+    "academic_level": Course.academic_level,
+    "offering_period": Course.offering_period,
+    "start_date": Course.start_date,
+    "end_date": Course.end_date,
+    "instructional_format": Course.instructional_format,
+    "delivery_mode": Course.delivery_mode,
+    "course_tags": Course.course_tags,
+    "academic_units": Course.academic_units,
+    "section_status": Course.section_status,
+    "waitlist_capacity": Course.waitlist_capacity,
+    "enrolled_capacity": Course.enrolled_capacity,
+}
+DATE_FIELDS = {"start_date", "end_date"}
+
+# What query_courses selects for each field. SQLite keeps dates as ISO text, so reading them as
+# strings gives the JSON value straight away instead of parsing a date only to isoformat it again.
+COURSE_ROW_COLUMNS = {
+    field: type_coerce(column, String).label(field) if field in DATE_FIELDS else column
+    for field, column in COURSE_FIELDS.items()
+}
+
+# Reads every COURSE_FIELDS attribute off a Course in one call, for serialize_course
+COURSE_VALUES = attrgetter(*(column.key for column in COURSE_FIELDS.values()))
+
+# Related rows /api/courses can attach to each course with ?include=
+COURSE_INCLUDES = ("instructors", "locations")
+
+# Query parameter -> column for the equality filters
+COURSE_FILTERS = {
+    "subject": Course.subject,
+    "academic_level": Course.academic_level,
+    "offering_period": Course.offering_period,
+    "delivery_mode": Course.delivery_mode,
+    "section_status": Course.section_status,
+}
+
+
+# "CS 3733-D01", "RBE 200X-CL01", ... at the start of Course_Section and inside LLM output
+SECTION_CODE = re.compile(r"\b[A-Z]{2,4} [0-9]{3,4}[A-Z]?-[A-Z0-9]+\b")
+
+CATALOG_VERSION_ROW = 1
+
+
+def get_catalog_version(db):
+    """
+    Returns the current catalog version, 0 if the catalog has never been loaded.
+    """
+    return db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ROW)) or 0
+
+
+def bump_catalog_version(session):
+    """
+    Increments the catalog version. Call inside the loader's transaction so the new version
+    becomes visible together with the new catalog rows.
+    """
+    now = datetime.utcnow()
+    result = session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == CATALOG_VERSION_ROW)
+        .values(version=CatalogVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        session.execute(insert(CatalogVersion).values(id=CATALOG_VERSION_ROW, version=1, updated_at=now))
+
+
+class CatalogVersionWatcher:
+    """
+    Tracks the catalog version for in-process caches, reading it from the database
+    at most once per check_interval seconds.
+    """
+
+    def __init__(self, get_version, check_interval=1.0):
+        self.get_version = get_version
+        self.check_interval = check_interval
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def current(self):
+        """
+        Returns the catalog version, refreshing it when the check interval has passed.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.version is not None and now - self.checked_at < self.check_interval:
+                return self.version
+        version = self.get_version()
+        with self.lock:
+            self.version = version
+            self.checked_at = now
+        return version
+
+    def reset(self):
+        """
+        Forces a database read on the next call to current().
+        """
+        with self.lock:
+            self.version = None
+
+
+class CatalogQueryError(ValueError):
+    """
+    Raised for malformed catalog query parameters.
+    """
+
+
+class CourseNotFoundError(LookupError):
+    """
+    Raised when a requested course id doesn't exist.
+    """
+
+
+def encode_cursor(course_id):
+    """
+    Turns the last course id on a page into an opaque cursor.
+    """
+    return base64.urlsafe_b64encode(str(course_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Reverses encode_cursor.
+    """
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise CatalogQueryError("Invalid cursor")
+
+
+def parse_fields(fields_param):
+    """
+    Parses ?fields=a,b,c into a list of field names. All fields are returned when empty.
+    id is always included since it backs the cursor.
+    """
+    if not fields_param:
+        return list(COURSE_FIELDS)
+    fields = [field.strip() for field in fields_param.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in COURSE_FIELDS]
+    if unknown:
+        raise CatalogQueryError(f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+
+def parse_limit(limit_param):
+    """
+    Parses ?limit=, clamped to MAX_PAGE_SIZE.
+    """
+    if not limit_param:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit_param)
+    except ValueError:
+        raise CatalogQueryError("limit must be an integer")
+    if limit < 1:
+        raise CatalogQueryError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_includes(include_param):
+    """
+    Parses ?include=instructors,locations.
+    """
+    if not include_param:
+        return []
+    includes = [include.strip() for include in include_param.split(",") if include.strip()]
+    unknown = [include for include in includes if include not in COURSE_INCLUDES]
+    if unknown:
+        raise CatalogQueryError(f"Unknown includes: {', '.join(unknown)}")
+    return includes
+
+
+def attach_related(db, courses, includes=COURSE_INCLUDES):
+    """
+    Adds instructor and location name lists to course dicts (which must have an "id") with one
+    IN query per relationship, however many courses there are.
+    """
+    if not courses or not includes:
+        return courses
+    course_ids = [course["id"] for course in courses]
+    columns = {
+        "instructors": (Instructor.course_id, Instructor.name, Instructor.id),
+        "locations": (Location.course_id, Location.location_name, Location.id),
+    }
+    for include in includes:
+        course_id_column, name_column, order_column = columns[include]
+        names = defaultdict(list)
+        for course_id, name in db.connection().execute(
+            select(course_id_column, name_column).where(course_id_column.in_(course_ids)).order_by(order_column)
+        ):
+            names[course_id].append(name)
+        for course in courses:
+            course[include] = names.get(course["id"], [])
+    return courses
+
+
+def query_courses(db, args, student_id=None):
+    """
+    Runs a keyset-paginated, filtered and projected catalog query from request args.
+    With student_id, courses that student has completed are left out.
+    Returns (list of course dicts, next cursor or None).
+    """
+    fields = parse_fields(args.get("fields"))
+    includes = parse_includes(args.get("include"))
+    limit = parse_limit(args.get("limit"))
+
+    stmt = select(*(COURSE_ROW_COLUMNS[field] for field in fields))
+    for param, column in COURSE_FILTERS.items():
+        value = args.get(param)
+        if value:
+            stmt = stmt.where(column == value)
+    if args.get("department"):
+        stmt = stmt.where(Course.department_id == select(Department.id).where(Department.name == args["department"]).scalar_subquery())
+    if args.get("cursor"):
+        stmt = stmt.where(Course.id > decode_cursor(args["cursor"]))
+    if student_id is not None:
+        stmt = exclude_completed(stmt, student_id)
+
+    # Fetch one extra row to know whether there is another page. Plain column rows, so the query runs
+    # on the session's connection and skips the ORM's result processing.
+    rows = db.connection().execute(stmt.order_by(Course.id).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results = [dict(zip(fields, row)) for row in rows]
+    attach_related(db, results, includes)
+
+    next_cursor = encode_cursor(rows[-1].id) if has_more else None
+    return results, next_cursor
+
+
+def serialize_course(course):
+    """
+    Full course dict with department, instructors and locations. The relationships must already be loaded.
+    """
+    data = dict(zip(COURSE_FIELDS, COURSE_VALUES(course)))
+    for field in DATE_FIELDS:
+        data[field] = data[field].isoformat() if data[field] else None
+    data["section_code"] = course.section_code
+    data["meeting_patterns"] = course.meeting_patterns
+    data["department"] = course.department.name if course.department else None
+    data["instructors"] = [instructor.name for instructor in course.instructors]
+    data["locations"] = [location.location_name for location in course.locations]
+    return data
+
+
+def get_course_details(db, course_ids):
+    """
+    Loads courses with their department, instructors and locations in three queries
+    (one for courses and departments, one per collection). Any other lazy load raises
+    instead of quietly adding a query per course. Returns dicts in course_ids order.
+    """
+    if not course_ids:
+        return []
+    courses = db.scalars(
+        select(Course)
+        .where(Course.id.in_(course_ids))
+        .options(
+            joinedload(Course.department),
+            selectinload(Course.instructors),
+            selectinload(Course.locations),
+            raiseload("*"),
+        )
+    ).unique().all()
+    by_id = {course.id: serialize_course(course) for course in courses}
+    return [by_id[course_id] for course_id in course_ids if course_id in by_id]
+
+
+def section_code(course_section):
+    """
+    "CS 3733-D01 - Software Engineering" -> "CS 3733-D01"
+    """
+    match = SECTION_CODE.match(course_section or "")
+    return match.group(0) if match else course_section
+
+
+def extract_section_codes(text):
+    """
+    Every distinct section code mentioned in free text, in order of appearance.
+    """
+    return list(dict.fromkeys(SECTION_CODE.findall(text or "")))
+
+
+def find_sections_by_code(db, codes):
+    """
+    Looks up sections by code with a single IN query, plus one per related table for instructors and
+    locations. Returns (sections found, codes not in the catalog).
+    """
+    if not codes:
+        return [], []
+    rows = db.execute(
+        select(
+            Course.id, Course.section_code, Course.course_section, Course.course_title, Course.credits,
+            Course.offering_period, Course.meeting_patterns, Course.section_status,
+        )
+        .where(Course.section_code.in_(codes))
+        .order_by(Course.id)
+    ).mappings().all()
+
+    found = {row["section_code"] for row in rows}
+    order = {code: position for position, code in enumerate(codes)}
+    sections = sorted((dict(row) for row in rows), key=lambda row: order[row["section_code"]])
+    attach_related(db, sections)
+    return sections, [code for code in codes if code not in found]
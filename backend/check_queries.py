@@ -0,0 +1,113 @@
+import sys
+from sqlalchemy import select
+from db import SessionFactory, count_queries
+from models import Course
+from catalog import get_course_details, query_courses, find_sections_by_code, encode_cursor, MAX_PAGE_SIZE
+from course_cache import DepartmentCourseCache
+from sync_catalog import remove_sections
+from profiles import load_profile_lists
+
+# Guards the hot read paths against regressions:
+# - N+1 queries: each path must run a fixed number of statements no matter how many courses it returns.
+# - Full table scans: EXPLAIN QUERY PLAN of every statement the paths run must use an index.
+# tests/test_query_budget.py runs the same checks under pytest on a seeded scratch database; this
+# script runs them against a real one.
+# Usage: python check_queries.py [courses]
+# courses is capped at MAX_PAGE_SIZE, which is also below selectinload's 500 ids per IN query.
+
+# Read path -> maximum statements
+QUERY_BUDGETS = {
+    "course details": 3,
+    "course list with instructors and locations": 3,
+    "schedule sections": 3,
+}
+
+
+def measure(db, course_count):
+    """
+    Runs each read path over course_count courses and returns {name: (statements, rows)}.
+    """
+    rows = db.execute(select(Course.id, Course.section_code).order_by(Course.id).limit(course_count)).all()
+    course_ids = [row.id for row in rows]
+    codes = [row.section_code for row in rows if row.section_code]
+
+    results = {}
+    with count_queries() as counter:
+        details = get_course_details(db, course_ids)
+    results["course details"] = (counter.count, len(details))
+    with count_queries() as counter:
+        courses, _ = query_courses(db, {"limit": str(course_count), "include": "instructors,locations"})
+    results["course list with instructors and locations"] = (counter.count, len(courses))
+    with count_queries() as counter:
+        sections, _ = find_sections_by_code(db, codes)
+    results["schedule sections"] = (counter.count, len(sections))
+    return results
+
+
+def run_hot_paths(db):
+    """
+    Runs the hot queries with realistic arguments and returns every (statement, parameters) they executed.
+    Writes are rolled back.
+    """
+    sample = db.execute(
+        select(Course.id, Course.subject, Course.academic_level, Course.offering_period, Course.delivery_mode,
+               Course.section_status, Course.section_code)
+        .order_by(Course.id).limit(20)
+    ).all()
+    if not sample:
+        raise SystemExit("The courses table is empty, load the catalog first")
+    first = sample[0]
+    course_ids = [row.id for row in sample]
+
+    with count_queries() as counter:
+        for param in ("subject", "academic_level", "offering_period", "delivery_mode", "section_status"):
+            query_courses(db, {param: getattr(first, param), "cursor": encode_cursor(first.id), "limit": "50"})
+        query_courses(db, {"cursor": encode_cursor(first.id), "include": "instructors,locations"})
+        query_courses(db, {"department": "Computer Science Department"})
+        query_courses(db, {"subject": first.subject}, student_id=1)
+        load_profile_lists(db, 1)
+        get_course_details(db, course_ids)
+        find_sections_by_code(db, [row.section_code for row in sample if row.section_code])
+        DepartmentCourseCache(SessionFactory).fetch("Computer Science Department")
+        remove_sections(db, course_ids[:5])
+        db.rollback()
+    return counter.statements
+
+
+def full_scans(db, statement, parameters):
+    """
+    Returns the EXPLAIN QUERY PLAN steps of a statement that read a whole table without an index.
+    Virtual tables (the FTS index) and constant rows don't count.
+    """
+    plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [
+        detail for _, _, _, detail in plan
+        if detail.startswith("SCAN ") and " USING " not in detail
+        and "VIRTUAL TABLE" not in detail and detail != "SCAN CONSTANT ROW"
+    ]
+
+
+if __name__ == "__main__":
+    course_count = min(int(sys.argv[1]) if len(sys.argv) > 1 else 200, MAX_PAGE_SIZE)
+    db = SessionFactory()
+    try:
+        results = measure(db, course_count)
+        statements = run_hot_paths(db)
+        scans = [(statement, steps) for statement, parameters in statements if (steps := full_scans(db, statement, parameters))]
+    finally:
+        db.rollback()
+        db.close()
+
+    failed = False
+    for name, (statement_count, row_count) in results.items():
+        ok = statement_count <= QUERY_BUDGETS[name]
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<45} {statement_count} queries for {row_count} courses (budget {QUERY_BUDGETS[name]})")
+
+    print(f"{'FAIL' if scans else 'ok  '} {'query plans':<45} {len(statements) - len(scans)} of {len(statements)} hot queries use indexes")
+    for statement, steps in scans:
+        failed = True
+        print(f"     {' '.join(statement.split())[:160]}")
+        for step in steps:
+            print(f"       -> {step}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict, namedtuple
+from sqlalchemy import select
+from models import Course, Department
+from catalog import CatalogVersionWatcher, get_catalog_version
+from solver import tokenize, OPEN_STATUS
+
+# Shared department -> course summary cache for the Swarm agents in run.py.
+# The catalog only changes when the loader runs, so summaries are cached until the catalog version moves.
+
+# One course with all of its sections folded together. Token sets are precomputed for ranking, see agent_context.py
+CourseSummary = namedtuple(
+    "CourseSummary",
+    "title academic_level sections open_sections title_tokens tag_tokens description_tokens",
+)
+
+
+def summarize_sections(rows):
+    """
+    Folds (title, academic_level, tags, description, status) section rows into one CourseSummary
+    per course, in order of first appearance.
+    """
+    grouped = OrderedDict()
+    for title, academic_level, tags, description, status in rows:
+        key = (title, academic_level)
+        entry = grouped.get(key)
+        if entry is None:
+            grouped[key] = entry = [tags, description, 0, 0]
+        entry[2] += 1
+        entry[3] += status == OPEN_STATUS
+    return tuple(
+        CourseSummary(
+            title, academic_level, sections, open_sections,
+            frozenset(tokenize(title)), frozenset(tokenize(tags)), frozenset(tokenize(description)),
+        )
+        for (title, academic_level), (tags, description, sections, open_sections) in grouped.items()
+    )
+
+
+class DepartmentCourseCache:
+    """
+    Bounded LRU of department name -> course summaries, dropped whenever the catalog version changes.
+    """
+
+    def __init__(self, session_factory, max_departments=64, version_check_interval=5.0):
+        self.session_factory = session_factory
+        self.max_departments = max_departments
+        self.version_watcher = CatalogVersionWatcher(self.read_version, version_check_interval)
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def read_version(self):
+        """
+        Reads the catalog version with a short-lived session.
+        """
+        db = self.session_factory()
+        try:
+            return get_catalog_version(db)
+        finally:
+            db.close()
+
+    def fetch(self, department_name):
+        """
+        Loads every section of a department with a single join query and folds them into course summaries.
+        """
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(
+                    Course.course_title, Course.academic_level, Course.course_tags,
+                    Course.course_description, Course.section_status,
+                )
+                .join(Department, Course.department_id == Department.id)
+                .where(Department.name == department_name)
+                .order_by(Course.id)
+            ).all()
+        finally:
+            db.close()
+        return summarize_sections(rows)
+
+    def get(self, department_name):
+        """
+        Returns the course summaries for a department, loading them on a miss.
+        """
+        version = self.version_watcher.current()
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            summaries = self.entries.get(department_name)
+            if summaries is not None:
+                self.entries.move_to_end(department_name)
+                self.hits += 1
+                return summaries
+            self.misses += 1
+
+        summaries = self.fetch(department_name)
+        with self.lock:
+            if version == self.version:
+                self.entries[department_name] = summaries
+                while len(self.entries) > self.max_departments:
+                    self.entries.popitem(last=False)
+        return summaries
+
+    def preload(self, department_names):
+        """
+        Warms the cache, e.g. with the agent departments at startup.
+        """
+        for department_name in department_names:
+            self.get(department_name)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the number of cached departments.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "departments": len(self.entries), "catalog_version": self.version}
@@ -0,0 +1,249 @@
+import os
+import json
+import math
+import shutil
+import zlib
+import logging
+import threading
+from collections import Counter
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Course, Department
+from catalog import CatalogVersionWatcher, get_catalog_version
+from solver import TOKEN, STOPWORDS, TITLE_WEIGHT, TAG_WEIGHT, DESCRIPTION_WEIGHT
+
+# Precomputed course vectors for matching a student's goals to sections without an LLM.
+# Each section's title, tags and description are turned into a TF-IDF vector with the hashing
+# trick (no vocabulary, no model, no network), L2-normalized and stored as a float32 matrix that
+# is memory-mapped at runtime. Retrieval is one matrix-vector product plus argpartition.
+# The loaders build the index after every catalog change; the app rebuilds it if it is stale.
+
+logger = logging.getLogger(__name__)
+
+COURSE_INDEX_PATH = os.getenv("COURSE_INDEX_PATH", "course_index")
+COURSE_INDEX_DIM = int(os.getenv("COURSE_INDEX_DIM", "256"))
+# Tokens are cut to this many characters, a crude stemmer: "robots" and "robotics" both become "robot"
+STEM_LENGTH = 5
+
+
+def index_tokens(text):
+    """
+    Lowercase, truncated word tokens with the solver's stopwords removed, keeping repeats for term frequency.
+    """
+    return [token[:STEM_LENGTH] for token in TOKEN.findall((text or "").lower()) if len(token) > 2 and token not in STOPWORDS]
+
+
+def hashed_features(fields, dim):
+    """
+    Maps weighted (text, weight) fields to {bucket: value} with signed feature hashing and
+    sublinear term frequency. crc32 keeps buckets stable across processes, unlike hash().
+    """
+    features = {}
+    for text, weight in fields:
+        for token, count in Counter(index_tokens(text)).items():
+            digest = zlib.crc32(token.encode("utf-8"))
+            bucket = digest % dim
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            features[bucket] = features.get(bucket, 0.0) + sign * weight * (1.0 + math.log(count))
+    return features
+
+
+class CourseEmbeddingIndex:
+    """
+    Row i of vectors describes section ids[i]. department_ids and titles are aligned with the rows.
+    """
+
+    def __init__(self, vectors, idf, ids, department_ids, titles, departments, catalog_version):
+        self.vectors = vectors
+        self.idf = idf
+        self.ids = ids
+        self.department_ids = department_ids
+        self.titles = titles
+        self.departments = departments
+        self.catalog_version = catalog_version
+        self.department_masks = {}
+
+    @classmethod
+    def build(cls, rows, departments, catalog_version, dim=COURSE_INDEX_DIM):
+        """
+        Builds the index from (id, department_id, course_title, course_tags, course_description) rows.
+        departments maps department name -> id.
+        """
+        rows = list(rows)
+        vectors = np.zeros((len(rows), dim), dtype=np.float32)
+        for row_index, (_, _, title, tags, description) in enumerate(rows):
+            features = hashed_features(((title, TITLE_WEIGHT), (tags, TAG_WEIGHT), (description, DESCRIPTION_WEIGHT)), dim)
+            if features:
+                vectors[row_index, list(features)] = list(features.values())
+
+        document_frequency = np.count_nonzero(vectors, axis=0)
+        idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        vectors *= idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        return cls(
+            vectors,
+            idf,
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([row[1] or 0 for row in rows], dtype=np.int64),
+            [row[2] for row in rows],
+            dict(departments),
+            catalog_version,
+        )
+
+    def save(self, path=COURSE_INDEX_PATH):
+        """
+        Writes the index to a directory, swapping it in whole so readers never see a half-written index.
+        """
+        staging = f"{path}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "vectors.npy"), self.vectors)
+        np.save(os.path.join(staging, "idf.npy"), self.idf)
+        np.save(os.path.join(staging, "ids.npy"), self.ids)
+        np.save(os.path.join(staging, "department_ids.npy"), self.department_ids)
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump({
+                "catalog_version": self.catalog_version,
+                "dim": int(self.vectors.shape[1]),
+                "departments": self.departments,
+                "titles": self.titles,
+            }, file)
+
+        previous = f"{path}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path=COURSE_INDEX_PATH):
+        """
+        Opens a saved index with the vector matrix memory-mapped. Returns None if there is none.
+        """
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as file:
+                meta = json.load(file)
+            return cls(
+                np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "idf.npy")),
+                np.load(os.path.join(path, "ids.npy")),
+                np.load(os.path.join(path, "department_ids.npy")),
+                meta["titles"],
+                meta["departments"],
+                meta["catalog_version"],
+            )
+        except FileNotFoundError:
+            return None
+
+    def query_vector(self, text):
+        """
+        Embeds free text (e.g. futureGoals) into the index space. Returns None if it has no usable words.
+        """
+        features = hashed_features(((text, 1.0),), self.vectors.shape[1])
+        if not features:
+            return None
+        vector = np.zeros(self.vectors.shape[1], dtype=np.float32)
+        vector[list(features)] = list(features.values())
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def department_mask(self, department_names):
+        """
+        Boolean row mask for sections in the given departments, cached per department set.
+        """
+        key = tuple(sorted(department_names))
+        mask = self.department_masks.get(key)
+        if mask is None:
+            department_ids = [self.departments[name] for name in key if name in self.departments]
+            mask = self.department_masks[key] = np.isin(self.department_ids, department_ids)
+        return mask
+
+    def top_k(self, text, k=20, department_names=None):
+        """
+        Returns up to k (course_id, title, score) tuples, best first, optionally limited to some departments.
+        Sections with no overlap with the query are left out.
+        """
+        query = self.query_vector(text)
+        if query is None or not len(self.ids):
+            return []
+        scores = self.vectors @ query
+        if department_names is not None:
+            scores = np.where(self.department_mask(department_names), scores, -np.inf)
+
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            (int(self.ids[row]), self.titles[row], float(scores[row]))
+            for row in best if scores[row] > 0
+        ]
+
+
+def build_course_index(session):
+    """
+    Builds the index from every section in the database, stamped with the current catalog version.
+    """
+    rows = session.execute(
+        select(Course.id, Course.department_id, Course.course_title, Course.course_tags, Course.course_description)
+        .order_by(Course.id)
+    ).all()
+    departments = dict(session.execute(select(Department.name, Department.id)).all())
+    return CourseEmbeddingIndex.build(rows, departments, get_catalog_version(session))
+
+
+def write_course_index(engine, path=COURSE_INDEX_PATH):
+    """
+    Rebuilds and saves the index. Called by fill_db.py and sync_catalog.py after loading the catalog.
+    """
+    with Session(engine) as session:
+        index = build_course_index(session)
+    index.save(path)
+    return index
+
+
+class CourseIndexCache:
+    """
+    Keeps the saved index open and rebuilds it when its catalog version falls behind the database.
+    """
+
+    def __init__(self, session_factory, path=COURSE_INDEX_PATH, version_check_interval=5.0):
+        self.session_factory = session_factory
+        self.path = path
+        self.version_watcher = CatalogVersionWatcher(self.read_version, version_check_interval)
+        self.index = None
+        self.lock = threading.Lock()
+
+    def read_version(self):
+        db = self.session_factory()
+        try:
+            return get_catalog_version(db)
+        finally:
+            db.close()
+
+    def get(self):
+        """
+        Returns an index for the current catalog version, loading or rebuilding it if needed.
+        """
+        version = self.version_watcher.current()
+        index = self.index
+        if index is not None and index.catalog_version == version:
+            return index
+
+        with self.lock:
+            if self.index is None or self.index.catalog_version != version:
+                index = CourseEmbeddingIndex.load(self.path)
+                if index is None or index.catalog_version != version:
+                    logger.info(f"Course index is missing or stale, rebuilding it for catalog version {version}")
+                    db = self.session_factory()
+                    try:
+                        index = build_course_index(db)
+                    finally:
+                        db.close()
+                    index.save(self.path)
+                self.index = index
+            return self.index
@@ -0,0 +1,191 @@
+import os
+import time
+import dotenv
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
+
+# Shared database engines and session factories for the Flask app and the Swarm agents
+
+dotenv.load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///WPI_COURSES.db")
+# Optional separate database for catalog reads, e.g. a copy refreshed by the loader. Catalog
+# reads use a read-only connection to DATABASE_URL when this is unset and DB_READ_ONLY_CATALOG=1.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+DB_READ_ONLY_CATALOG = os.getenv("DB_READ_ONLY_CATALOG", "0") == "1"
+
+# SQLite tuning, applied to every new connection. WAL lets readers run while a write commits,
+# NORMAL sync is safe in WAL mode (a power cut can lose the last commits, not corrupt the file)
+# and busy_timeout makes writers queue for the lock instead of failing with "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+
+def sqlite_pragmas(read_only=False):
+    """
+    PRAGMA statements run on every new SQLite connection. journal_mode is stored in the database
+    file, so read-only connections skip it and rely on the writer having set it.
+    """
+    pragmas = [
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if not read_only:
+        pragmas.insert(0, f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that also records how long each checkout waited for a connection, see pool_metrics.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self.stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def pool_metrics(engine):
+    """
+    Returns the engine's pool size, checked out and overflow connections, and checkout wait times.
+    """
+    pool = engine.pool
+    metrics = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool.stats_lock:
+            metrics.update({
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "wait_ms_avg": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                "wait_ms_max": round(pool.wait_max * 1000, 3),
+            })
+    return metrics
+
+
+def create_db_engine(url=DATABASE_URL, read_only=False, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW):
+    """
+    Creates an engine. For SQLite files this applies the tuning pragmas on connect and uses a
+    bounded QueuePool so threads reuse connections (and their page cache and mmap). read_only
+    opens the file with mode=ro, so catalog reads can never take the write lock.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return create_engine(url)
+
+    if read_only:
+        url = url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"})
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def refuse_flush(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise RuntimeError("This session is read-only; use a write session to change data")
+
+
+# SessionFactory / ReadSessionFactory give plain sessions to code that opens and closes its own
+# (caches, background jobs, scripts). SessionLocal / ReadSessionLocal are the thread-local sessions
+# of the Flask request being served, see request_db.py, which removes them when the request ends.
+engine = create_db_engine(DATABASE_URL)
+SessionFactory = sessionmaker(bind=engine)
+SessionLocal = scoped_session(SessionFactory)
+
+# Catalog reads (course pages, search, agent course lists) can go to a read-only engine
+if READ_DATABASE_URL or DB_READ_ONLY_CATALOG:
+    read_engine = create_db_engine(READ_DATABASE_URL or DATABASE_URL, read_only=True)
+else:
+    read_engine = engine
+ReadSessionFactory = sessionmaker(bind=read_engine, info={"read_only": True})
+ReadSessionLocal = scoped_session(ReadSessionFactory)
+
+# Sessions marked read_only (catalog reads, GET requests) fail on flush instead of writing
+event.listen(SessionFactory, "before_flush", refuse_flush)
+event.listen(ReadSessionFactory, "before_flush", refuse_flush)
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements an engine executes, see count_queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append((statement, parameters))
+
+
+@contextmanager
+def count_queries(bind=engine):
+    """
+    Counts every statement executed on bind inside the block:
+
+        with count_queries() as counter:
+            get_course_details(db, ids)
+        assert counter.count <= 3
+    """
+    counter = QueryCounter()
+    event.listen(bind, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", counter)
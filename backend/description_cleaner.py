@@ -0,0 +1,50 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+
+# Number of processes used to clean descriptions, 1 cleans in-process
+CLEAN_WORKERS = int(os.getenv("FILL_DB_WORKERS", os.cpu_count() or 1))
+
+
+def clean_description(html):
+    """
+    Strips HTML tags from a course description.
+    Text without tags or entities is returned without running the parser, which gives the same result.
+    """
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return html.strip()
+    return BeautifulSoup(html, "html.parser").get_text(separator="\n").strip()
+
+
+def clean_descriptions(html_list):
+    """
+    Cleans a batch of descriptions. Runs inside the worker processes.
+    """
+    return [clean_description(html) for html in html_list]
+
+
+def iter_cleaned_chunks(chunks, workers=CLEAN_WORKERS):
+    """
+    Pipeline stage that pairs every chunk of Report_Entry records with its cleaned descriptions.
+    Chunks are cleaned across a process pool with a bounded number in flight, so memory stays flat
+    and output order matches input order.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, clean_descriptions([entry.get("Course_Description", "") for entry in chunk])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(clean_descriptions, [entry.get("Course_Description", "") for entry in chunk])))
+            # Keep a couple of chunks queued per worker
+            if len(pending) >= workers * 2:
+                done_chunk, future = pending.popleft()
+                yield done_chunk, future.result()
+        while pending:
+            done_chunk, future = pending.popleft()
+            yield done_chunk, future.result()
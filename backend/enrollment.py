@@ -0,0 +1,239 @@
+import time
+import threading
+from datetime import datetime
+from sqlalchemy import select, update, insert, delete, func, and_, or_
+from sqlalchemy.exc import IntegrityError
+from models import Course, Enrollment
+from catalog import CourseNotFoundError
+from solver import parse_capacity
+
+# Seat reservations. The export's "enrolled/capacity" strings are parsed into integer counters on
+# Course when the catalog is loaded, and every enroll or drop moves a counter with one conditional
+# UPDATE, so two requests can never both take the last seat: SQLite serializes the writes and the
+# WHERE clause re-checks the count inside the write. Live counts are served from SeatCache.
+
+ENROLLED = "enrolled"
+WAITLISTED = "waitlisted"
+# Sections that take no enrollments; "Removed" is sync_catalog.REMOVED_STATUS
+CLOSED_STATUSES = ("Closed", "Removed")
+
+
+class EnrollmentError(Exception):
+    """
+    Raised when an enrollment can't be made or dropped. status_code is the HTTP status to return.
+    """
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def seat_counters(enrolled_capacity, waitlist_capacity):
+    """
+    Course counter columns for the export's capacity strings. A missing or unreadable
+    capacity leaves the limit null, which means unlimited, as in the solver.
+    """
+    enrolled = parse_capacity(enrolled_capacity)
+    waitlist = parse_capacity(waitlist_capacity)
+    return {
+        "enrolled_count": enrolled[0] if enrolled else 0,
+        "enrolled_limit": enrolled[1] if enrolled else None,
+        "waitlist_count": waitlist[0] if waitlist else 0,
+        "waitlist_limit": waitlist[1] if waitlist else None,
+    }
+
+
+def has_room(count_column, limit_column):
+    return or_(limit_column.is_(None), count_column < limit_column)
+
+
+def reserve_seat(db, course_id):
+    """
+    Takes a seat, or a waitlist spot when the section is full, each with a single conditional UPDATE.
+    Returns ENROLLED, WAITLISTED or None when both are full.
+    """
+    open_section = and_(Course.id == course_id, Course.section_status.notin_(CLOSED_STATUSES))
+    taken = db.execute(
+        update(Course)
+        .where(open_section, has_room(Course.enrolled_count, Course.enrolled_limit))
+        .values(enrolled_count=Course.enrolled_count + 1)
+    ).rowcount
+    if taken:
+        return ENROLLED
+    taken = db.execute(
+        update(Course)
+        .where(open_section, has_room(Course.waitlist_count, Course.waitlist_limit))
+        .values(waitlist_count=Course.waitlist_count + 1)
+    ).rowcount
+    return WAITLISTED if taken else None
+
+
+def enroll(db, student_id, course_id):
+    """
+    Enrolls a student in a section, spilling over onto the waitlist. Commits and returns the status.
+    Raises CourseNotFoundError, or EnrollmentError if the student is already in the section or it is full.
+    """
+    try:
+        status = reserve_seat(db, course_id)
+        if status is None:
+            section_status = db.scalar(select(Course.section_status).where(Course.id == course_id))
+            if section_status is None:
+                raise CourseNotFoundError(course_id)
+            if section_status in CLOSED_STATUSES:
+                raise EnrollmentError("Section is closed")
+            raise EnrollmentError("Section and waitlist are full")
+        # The unique (student_id, course_id) index turns a second enrollment into an IntegrityError,
+        # which rolls back the seat taken above
+        db.execute(insert(Enrollment).values(
+            student_id=student_id, course_id=course_id, status=status, created_at=datetime.utcnow(),
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise EnrollmentError("Already enrolled in this section")
+    except Exception:
+        db.rollback()
+        raise
+    return status
+
+
+def drop(db, student_id, course_id):
+    """
+    Drops a student's enrollment or waitlist spot and gives a freed seat to the first student on the
+    waitlist. Commits and returns the dropped status. Raises EnrollmentError(404) if there was none.
+    """
+    try:
+        dropped = db.execute(
+            delete(Enrollment)
+            .where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+            .returning(Enrollment.status)
+        ).scalar()
+        if dropped is None:
+            raise EnrollmentError("Not enrolled in this section", 404)
+
+        if dropped == WAITLISTED:
+            db.execute(update(Course).where(Course.id == course_id).values(waitlist_count=Course.waitlist_count - 1))
+        else:
+            next_in_line = db.scalar(
+                select(Enrollment.id)
+                .where(Enrollment.course_id == course_id, Enrollment.status == WAITLISTED)
+                .order_by(Enrollment.created_at, Enrollment.id)
+                .limit(1)
+            )
+            if next_in_line is not None:
+                # The seat moves to the waitlisted student: enrolled_count stays, the waitlist shrinks
+                db.execute(update(Enrollment).where(Enrollment.id == next_in_line).values(status=ENROLLED))
+                db.execute(update(Course).where(Course.id == course_id).values(waitlist_count=Course.waitlist_count - 1))
+            else:
+                db.execute(update(Course).where(Course.id == course_id).values(enrolled_count=Course.enrolled_count - 1))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return dropped
+
+
+def student_enrollments(db, student_id):
+    """
+    Returns [{"course_id", "status", "created_at"}] for a student, oldest first.
+    """
+    rows = db.execute(
+        select(Enrollment.course_id, Enrollment.status, Enrollment.created_at)
+        .where(Enrollment.student_id == student_id)
+        .order_by(Enrollment.created_at, Enrollment.id)
+    ).all()
+    return [
+        {"course_id": row.course_id, "status": row.status, "created_at": row.created_at.isoformat() if row.created_at else None}
+        for row in rows
+    ]
+
+
+def recount_seats(db, course_ids):
+    """
+    Adds this app's enrollments on top of the counters of sections whose capacity strings were just
+    reloaded from the export, which resets them. Used by sync_catalog.py.
+    """
+    def held(status):
+        return (
+            select(func.count()).select_from(Enrollment)
+            .where(Enrollment.course_id == Course.id, Enrollment.status == status)
+            .scalar_subquery()
+        )
+
+    db.execute(
+        update(Course)
+        .where(Course.id.in_(course_ids))
+        .values(enrolled_count=Course.enrolled_count + held(ENROLLED), waitlist_count=Course.waitlist_count + held(WAITLISTED))
+    )
+
+
+class SeatCache:
+    """
+    Live seat counts per section, kept in process. Each process drops a section's entry when it
+    enrolls or drops there; max_age bounds how stale counts changed by other processes can get.
+    """
+
+    def __init__(self, session_factory, max_age=2.0):
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self.seats = {}
+        self.lock = threading.Lock()
+
+    def get_many(self, course_ids):
+        """
+        Returns {course_id: seats} for the ids that exist, loading every missing or expired one in one query.
+        """
+        now = time.monotonic()
+        result, missing = {}, []
+        with self.lock:
+            for course_id in course_ids:
+                entry = self.seats.get(course_id)
+                if entry is not None and now - entry[0] < self.max_age:
+                    result[course_id] = entry[1]
+                else:
+                    missing.append(course_id)
+        if not missing:
+            return result
+
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(Course.id, Course.section_status, Course.enrolled_count, Course.enrolled_limit,
+                       Course.waitlist_count, Course.waitlist_limit)
+                .where(Course.id.in_(missing))
+            ).all()
+        finally:
+            db.close()
+
+        loaded = {row.id: seats_dict(row) for row in rows}
+        with self.lock:
+            for course_id, seats in loaded.items():
+                self.seats[course_id] = (now, seats)
+        result.update(loaded)
+        return result
+
+    def get(self, course_id):
+        return self.get_many([course_id]).get(course_id)
+
+    def invalidate(self, course_id):
+        with self.lock:
+            self.seats.pop(course_id, None)
+
+
+def seats_dict(row):
+    """
+    Serializes a section's counters. Null limits are unlimited, reported as null seats left.
+    """
+    def left(count, limit):
+        return None if limit is None else max(limit - (count or 0), 0)
+
+    return {
+        "course_id": row.id,
+        "section_status": row.section_status,
+        "enrolled": row.enrolled_count or 0,
+        "capacity": row.enrolled_limit,
+        "seats_left": left(row.enrolled_count, row.enrolled_limit),
+        "waitlisted": row.waitlist_count or 0,
+        "waitlist_capacity": row.waitlist_limit,
+        "waitlist_left": left(row.waitlist_count, row.waitlist_limit),
+    }
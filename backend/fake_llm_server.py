@@ -0,0 +1,147 @@
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Minimal OpenAI-compatible chat completions server for local testing and benchmarks.
+# Point the backend at it with:
+#   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake python app.py
+
+DEFAULT_REPLY = (
+    "Here is your final schedule:\n"
+    "1. CS 3733-D01 - Software Engineering\n"
+    "2. RBE 2002-D01 - Unified Robotics II\n"
+    "3. HI 1332-D01 - Introduction To Global History\n"
+    "Good luck this term!"
+)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """
+    Answers every chat completion with the server's canned reply after the configured latency.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.request_count += 1
+
+        time.sleep(self.server.latency)
+        if request.get("stream"):
+            self.stream_reply(request)
+        else:
+            self.send_json(self.completion(request))
+
+    def completion(self, request):
+        """
+        Builds a non-streaming chat.completion body.
+        """
+        prompt_tokens = sum(len(str(message.get("content") or "").split()) for message in request.get("messages", []))
+        completion_tokens = len(self.server.reply.split())
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def stream_reply(self, request):
+        """
+        Sends the reply word by word as chat.completion.chunk server-sent events.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = self.server.reply.split(" ")
+        for index, word in enumerate(words):
+            delta = {"content": word if index == len(words) - 1 else word + " "}
+            if index == 0:
+                delta["role"] = "assistant"
+            self.write_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            })
+            time.sleep(self.server.token_latency)
+        self.write_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        })
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def write_event(self, data):
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_llm_server(host="127.0.0.1", port=0, latency=0.0, token_latency=0.0, reply=DEFAULT_REPLY):
+    """
+    Starts the server on a background thread. Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.token_latency = token_latency
+    server.reply = reply
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before each response starts")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds between streamed words")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_llm_server(args.host, args.port, args.latency, args.token_latency)
+    print(f"Fake LLM listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
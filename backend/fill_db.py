@@ -1,91 +1,229 @@
+import os
+import re
 import json
+import time
+import hashlib
+from itertools import islice
 from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
 from models import Base, Department, Course, Instructor, Location
-from bs4 import BeautifulSoup
+from description_cleaner import CLEAN_WORKERS, iter_cleaned_chunks
+from schema import ensure_schema
+from catalog import bump_catalog_version, section_code
+from course_index import write_course_index
+from enrollment import seat_counters
+from db import create_db_engine
 
 # Database configuration
-DATABASE_URL = 'sqlite:///WPI_COURSES.db'
-
-# Create a database engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-
-# Create a session
-Session = sessionmaker(bind=engine)
-session = Session()
-
-# Load the JSON data
-with open('courses.json', 'r', encoding='utf-8') as file:
-    data = json.load(file)
-
-# Extract course entries
-course_entries = data["Report_Entry"]
-
-for entry in course_entries:
-    # Get the department name and strip whitespace
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///WPI_COURSES.db")
+COURSES_FILE = os.getenv("COURSES_FILE", "courses.json")
+CHUNK_SIZE = int(os.getenv("FILL_DB_CHUNK_SIZE", "1000"))
+
+WHITESPACE = re.compile(r"\s*")
+
+# Bump when build_course_row starts storing something new, so sync_catalog.py rewrites every row
+ROW_FORMAT_VERSION = 3
+
+
+def iter_report_entries(path, buffer_size=64 * 1024):
+    """
+    Yields Report_Entry records from a Workday export one at a time.
+    Only a small read buffer is held in memory, so this works for exports of any size.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        # Skip ahead to the opening bracket of the Report_Entry array
+        buffer = ""
+        while True:
+            chunk = file.read(buffer_size)
+            if not chunk:
+                raise ValueError(f"No Report_Entry array found in {path}")
+            buffer += chunk
+            match = re.search(r'"Report_Entry"\s*:\s*\[', buffer)
+            if match:
+                pos = match.end()
+                break
+            buffer = buffer[-64:] # Keep enough to match a key split across reads
+
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ",":
+                pos = WHITESPACE.match(buffer, pos + 1).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+
+            try:
+                entry, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The next record is split across reads, pull in more data
+                chunk = file.read(buffer_size)
+                if not chunk:
+                    raise ValueError(f"Truncated Report_Entry array in {path}")
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield entry
+
+
+def chunked(iterable, size):
+    """
+    Groups an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_date(date_str):
+    """
+    Parses a Workday YYYY-MM-DD date, returning None for empty values.
+    """
+    return datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else None
+
+
+def entry_hash(entry):
+    """
+    Stable hash of a Report_Entry, used to detect changed sections between catalog loads.
+    """
+    return hashlib.sha1(f"{ROW_FORMAT_VERSION}:{json.dumps(entry, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+
+def build_course_row(entry, department_id, course_description):
+    """
+    Maps a Report_Entry and its cleaned description onto a dict of Course column values.
+    """
     department_name = entry.get("Academic_Units", "").strip()
 
-    # Check if the department already exists
-    department = session.query(Department).filter_by(name=department_name).first()
-
-    if not department:
-        # Create a new Department
-        department = Department(name=department_name)
-        session.add(department)
-        session.commit() # Commit to generate the department ID
-
-    # Parse dates
-    start_date_str = entry.get("Course_Section_Start_Date")
-    end_date_str = entry.get("Course_Section_End_Date")
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else None
-    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else None
-
-    # Clean course description by stripping HTML tags
-    course_description_html = entry.get("Course_Description", "")
-    course_description = BeautifulSoup(course_description_html, "html.parser").get_text(separator="\n").strip()
-
-    # Parse credits
-    credits = float(entry.get("Credits", 0))
-
-    # Create Course instance
-    course = Course(
-        course_section=entry["Course_Section"],
-        course_title=entry["Course_Title"],
-        subject=entry["Subject"],
-        course_description=course_description,
-        credits=credits,
-        academic_level=entry["Academic_Level"],
-        offering_period=entry["Offering_Period"],
-        start_date=start_date,
-        end_date=end_date,
-        instructional_format=entry["Instructional_Format"],
-        delivery_mode=entry["Delivery_Mode"],
-        course_tags=entry["Course_Tags"],
-        academic_units=department_name,
-        section_status=entry["Section_Status"],
-        waitlist_capacity=entry["Waitlist_Waitlist_Capacity"],
-        enrolled_capacity=entry["Enrolled_Capacity"],
-        department=department # Link to Department
-    )
-    session.add(course)
-    session.commit() # Commit to generate the course ID
-
-    # Add Instructors
-    instructors = entry.get("Instructors", "").split(",")
-    for instructor_name in instructors:
-        instructor = Instructor(name=instructor_name.strip(), course=course)
-        session.add(instructor)
-    session.commit()
-
-    # Add Locations
-    locations = entry.get("Locations", "").split(",")
-    for location_name in locations:
-        location = Location(location_name=location_name.strip(), course=course)
-        session.add(location)
-    session.commit()
-
-# Close the session
-session.close()
-
-print("Database filling complete.")
\ No newline at end of file
+    return {
+        "course_section": entry["Course_Section"],
+        "section_code": section_code(entry["Course_Section"]),
+        "course_title": entry["Course_Title"],
+        "subject": entry["Subject"],
+        "course_description": course_description,
+        "credits": float(entry.get("Credits", 0)),
+        "academic_level": entry["Academic_Level"],
+        "offering_period": entry["Offering_Period"],
+        "start_date": parse_date(entry.get("Course_Section_Start_Date")),
+        "end_date": parse_date(entry.get("Course_Section_End_Date")),
+        "instructional_format": entry["Instructional_Format"],
+        "delivery_mode": entry["Delivery_Mode"],
+        "course_tags": entry["Course_Tags"],
+        "academic_units": department_name,
+        "section_status": entry["Section_Status"],
+        "waitlist_capacity": entry["Waitlist_Waitlist_Capacity"],
+        "enrolled_capacity": entry["Enrolled_Capacity"],
+        **seat_counters(entry["Enrolled_Capacity"], entry["Waitlist_Waitlist_Capacity"]),
+        "meeting_patterns": entry.get("Meeting_Patterns", ""),
+        "source_hash": entry_hash(entry),
+        "department_id": department_id,
+    }
+
+
+def split_names(value):
+    """
+    Splits a comma separated Workday field into stripped names.
+    """
+    return [name.strip() for name in (value or "").split(",")]
+
+
+def load_department_map(session):
+    """
+    Returns {department name: id} for every department already in the database.
+    """
+    return {name: dept_id for dept_id, name in session.execute(select(Department.id, Department.name))}
+
+
+def ensure_departments(session, entries, department_map):
+    """
+    Creates any departments in entries that aren't in department_map yet, in one statement.
+    department_map is updated in place. Returns the number of departments created.
+    """
+    new_departments = [
+        name for name in dict.fromkeys(entry.get("Academic_Units", "").strip() for entry in entries)
+        if name not in department_map
+    ]
+    if new_departments:
+        rows = session.execute(
+            insert(Department).returning(Department.id, Department.name, sort_by_parameter_order=True),
+            [{"name": name} for name in new_departments],
+        )
+        department_map.update({name: dept_id for dept_id, name in rows})
+    return len(new_departments)
+
+
+def build_child_rows(entries, course_ids):
+    """
+    Builds the Instructor and Location rows for a batch of entries and their course ids.
+    """
+    instructor_rows = []
+    location_rows = []
+    for entry, course_id in zip(entries, course_ids):
+        instructor_rows.extend({"name": name, "course_id": course_id} for name in split_names(entry.get("Instructors")))
+        location_rows.extend({"location_name": name, "course_id": course_id} for name in split_names(entry.get("Locations")))
+    return instructor_rows, location_rows
+
+
+def bulk_load_entries(session, entries, department_map, descriptions):
+    """
+    Bulk inserts a batch of Report_Entry records along with their instructors and locations.
+    descriptions holds the cleaned Course_Description for each entry.
+    New departments are added to department_map as they are seen. Returns the number of rows written.
+    """
+    if not entries:
+        return 0
+    department_count = ensure_departments(session, entries, department_map)
+
+    course_rows = [
+        build_course_row(entry, department_map[entry.get("Academic_Units", "").strip()], description)
+        for entry, description in zip(entries, descriptions)
+    ]
+    course_ids = session.scalars(
+        insert(Course).returning(Course.id, sort_by_parameter_order=True),
+        course_rows,
+    ).all()
+
+    instructor_rows, location_rows = build_child_rows(entries, course_ids)
+    if instructor_rows:
+        session.execute(insert(Instructor), instructor_rows)
+    if location_rows:
+        session.execute(insert(Location), location_rows)
+
+    return department_count + len(course_rows) + len(instructor_rows) + len(location_rows)
+
+
+def load_catalog(engine, entries, chunk_size=CHUNK_SIZE, workers=CLEAN_WORKERS):
+    """
+    Loads Report_Entry records in fixed-size chunks inside a single transaction.
+    entries may be any iterable, including the iter_report_entries stream. Descriptions are cleaned
+    in a separate process pool stage (see description_cleaner). Returns (courses loaded, rows written).
+    """
+    course_count = 0
+    rows_written = 0
+    cleaned_chunks = iter_cleaned_chunks(chunked(entries, chunk_size), workers)
+    with Session(engine) as session, session.begin():
+        department_map = load_department_map(session)
+        for chunk, descriptions in cleaned_chunks:
+            rows_written += bulk_load_entries(session, chunk, department_map, descriptions)
+            course_count += len(chunk)
+        bump_catalog_version(session)
+    return course_count, rows_written
+
+
+if __name__ == "__main__":
+    # Create a database engine
+    engine = create_db_engine(DATABASE_URL)
+    ensure_schema(engine)
+
+    # Stream the JSON data straight into the database
+    start = time.perf_counter()
+    course_count, row_count = load_catalog(engine, iter_report_entries(COURSES_FILE))
+    elapsed = time.perf_counter() - start
+
+    print(f"Database filling complete. Loaded {course_count} courses ({row_count} rows) "
+          f"in {elapsed:.2f}s ({row_count / max(elapsed, 1e-9):,.0f} rows/sec).")
+
+    # Precompute the course vectors the agents use to match goals to courses
+    start = time.perf_counter()
+    index = write_course_index(engine)
+    print(f"Course index built for {len(index.ids)} sections in {time.perf_counter() - start:.2f}s.")
@@ -0,0 +1,196 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Background job queue for schedule generation. A Swarm run can take tens of seconds,
+# so it runs on a bounded worker pool instead of a Flask request thread. Jobs can publish
+# progress events (streamed model output) to a per-job buffer that request threads read from.
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueError(Exception):
+    """
+    Raised when a job can't be accepted. status_code is the HTTP status to return.
+    """
+
+    def __init__(self, message, status_code=429):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ScheduleJob:
+    """
+    One schedule generation request and its outcome.
+    """
+
+    def __init__(self, user_id, payload):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.events_changed = threading.Condition()
+
+    def publish(self, event, data):
+        """
+        Appends a progress event for readers of wait_events.
+        """
+        with self.events_changed:
+            self.events.append((event, data))
+            self.events_changed.notify_all()
+
+    def wait_events(self, start, timeout=None):
+        """
+        Returns (events published from index start on, finished). Waits up to timeout seconds when
+        there are none yet. Once finished is True every event has been returned.
+        """
+        with self.events_changed:
+            if len(self.events) <= start and self.finished_at is None:
+                self.events_changed.wait(timeout)
+            return self.events[start:], self.finished_at is not None
+
+    def to_dict(self, queue_position=None):
+        """
+        Serializes the job for the status endpoint.
+        """
+        now = time.time()
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "queued_seconds": round((self.started_at or now) - self.created_at, 3),
+        }
+        if self.status == QUEUED:
+            data["queue_position"] = queue_position
+        if self.started_at:
+            data["running_seconds"] = round((self.finished_at or now) - self.started_at, 3)
+        if self.status == DONE:
+            data["result"] = self.result
+        if self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class ScheduleJobQueue:
+    """
+    Runs jobs on a bounded thread pool with a cap on queue depth and on active jobs per user.
+    run_job is called as run_job(payload, publish), publish being the job's ScheduleJob.publish.
+    Finished jobs are kept for result_ttl seconds so clients can collect them.
+    """
+
+    def __init__(self, run_job, max_workers=4, max_queue_depth=100, max_jobs_per_user=1, result_ttl=3600):
+        self.run_job = run_job
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.max_jobs_per_user = max_jobs_per_user
+        self.result_ttl = result_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schedule-job")
+        self.jobs = OrderedDict()
+        self.queued = OrderedDict()
+        self.active_by_user = {}
+        self.counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.total_run_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def submit(self, user_id, payload):
+        """
+        Queues a job and returns it. Raises JobQueueError if the queue or the user's quota is full.
+        """
+        with self.lock:
+            self.evict_expired()
+            if len(self.queued) >= self.max_queue_depth:
+                self.counters["rejected"] += 1
+                raise JobQueueError("Schedule queue is full, please try again shortly", 503)
+            if self.active_by_user.get(user_id, 0) >= self.max_jobs_per_user:
+                self.counters["rejected"] += 1
+                raise JobQueueError("A schedule is already being generated for this user")
+
+            job = ScheduleJob(user_id, payload)
+            self.jobs[job.id] = job
+            self.queued[job.id] = job
+            self.active_by_user[user_id] = self.active_by_user.get(user_id, 0) + 1
+            self.counters["submitted"] += 1
+
+        self.executor.submit(self.execute, job)
+        return job
+
+    def execute(self, job):
+        """
+        Worker body: runs the job and records its result.
+        """
+        with self.lock:
+            self.queued.pop(job.id, None)
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        try:
+            result = self.run_job(job.payload, job.publish)
+        except Exception as e:
+            logger.exception(f"Schedule job {job.id} failed")
+            status, result, error = FAILED, None, str(e)
+        else:
+            status, error = DONE, None
+
+        with self.lock:
+            job.finished_at = time.time()
+            job.result = result
+            job.error = error
+            job.status = status
+            self.counters["completed" if status == DONE else "failed"] += 1
+            self.total_run_seconds += job.finished_at - job.started_at
+            self.active_by_user[job.user_id] -= 1
+            if not self.active_by_user[job.user_id]:
+                del self.active_by_user[job.user_id]
+        # Wake readers waiting on events, finished_at is set now
+        with job.events_changed:
+            job.events_changed.notify_all()
+
+    def get(self, job_id):
+        """
+        Returns (job, status dict) or (None, None) if the job is unknown or expired.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None, None
+            position = list(self.queued).index(job_id) + 1 if job_id in self.queued else None
+            return job, job.to_dict(position)
+
+    def evict_expired(self):
+        """
+        Drops finished jobs older than result_ttl. Caller must hold the lock.
+        """
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def metrics(self):
+        """
+        Returns queue depth, worker usage and job counters.
+        """
+        with self.lock:
+            running = sum(1 for job in self.jobs.values() if job.status == RUNNING)
+            finished = self.counters["completed"] + self.counters["failed"]
+            return {
+                "queue_depth": len(self.queued),
+                "running": running,
+                "max_workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "tracked_jobs": len(self.jobs),
+                "avg_run_seconds": round(self.total_run_seconds / finished, 3) if finished else None,
+                **self.counters,
+            }
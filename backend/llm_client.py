@@ -0,0 +1,53 @@
+import os
+import threading
+import httpx
+from openai import OpenAI
+
+# Process-wide model client. Building an OpenAI client per request throws away its HTTP
+# connection pool, so every schedule paid for a fresh TCP + TLS handshake. One pooled client
+# is created lazily on first use and shared by every thread.
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+
+_lock = threading.Lock()
+_openai_client = None
+_swarm_client = None
+
+
+def create_openai_client():
+    """
+    Builds an OpenAI client with a pooled, keep-alive HTTP connection.
+    Reads OPENAI_API_KEY / OPENAI_BASE_URL from the environment like OpenAI() does.
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS),
+        timeout=OPENAI_TIMEOUT,
+    )
+    return OpenAI(http_client=http_client)
+
+
+def get_openai_client():
+    """
+    Returns the shared OpenAI client, creating it on first use.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                _openai_client = create_openai_client()
+    return _openai_client
+
+
+def get_swarm_client():
+    """
+    Returns the shared Swarm client, backed by the shared OpenAI client and reporting to metrics.py.
+    """
+    global _swarm_client
+    if _swarm_client is None:
+        from swarm_metrics import InstrumentedSwarm
+        client = get_openai_client()
+        with _lock:
+            if _swarm_client is None:
+                _swarm_client = InstrumentedSwarm(client=client)
+    return _swarm_client
@@ -0,0 +1,361 @@
+import os
+import time
+import bisect
+import resource
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+
+# In-process metrics.
+# - EndpointLatencyStats: per-endpoint percentiles over recent requests, for /api/internal/latency.
+# - Counter / Histogram in REGISTRY: Prometheus metrics served as text on /metrics. Recording one
+#   is a dict lookup and a few additions under a lock, cheap enough for every request and query.
+# - instrumented_run: per-run totals (model calls, tool calls, handoffs, queries, tokens) for Swarm runs.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000
+# Seconds. Requests and model calls span a millisecond cache hit to a minute-long Swarm run
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def rss_mb():
+    """
+    Current resident set size in MB, or the peak where /proc isn't available.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing value per label set.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}" for labels, value in values]
+        return lines
+
+
+class Histogram:
+    """
+    Observations counted into fixed cumulative buckets per label set, plus their sum and count.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self.series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """
+        Registers a function returning [(name, type, documentation, [(labels dict, value)])], called
+        at scrape time for values that live elsewhere (pool sizes, queue depths).
+        """
+        self.collectors.append(collect)
+
+    def render(self):
+        """
+        The Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collect in self.collectors:
+            for name, metric_type, documentation, samples in collect():
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+                lines += [
+                    f"{name}{format_labels(list(labels), list(labels.values()))} {format_value(value)}"
+                    for labels, value in samples
+                ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+http_requests = REGISTRY.counter("http_requests_total", "HTTP requests by route, method and status.", ("method", "route", "status"))
+http_latency = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+db_queries = REGISTRY.counter("db_queries_total", "SQL statements executed, by engine and statement type.", ("engine", "operation"))
+db_query_latency = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL statement latency by engine and statement type.", ("engine", "operation"), QUERY_BUCKETS,
+)
+llm_calls = REGISTRY.counter("llm_completions_total", "Model completions by agent and model.", ("agent", "model"))
+llm_latency = REGISTRY.histogram(
+    "llm_completion_duration_seconds",
+    "Model completion latency by agent (time to the first chunk for streamed completions).", ("agent", "model"),
+)
+llm_tokens = REGISTRY.counter(
+    "llm_tokens_total", "Tokens reported by the model API, by agent and kind (prompt or completion).", ("agent", "kind"),
+)
+agent_tool_calls = REGISTRY.counter("agent_tool_calls_total", "Agent tool calls by agent, tool and outcome.", ("agent", "tool", "outcome"))
+agent_tool_latency = REGISTRY.histogram("agent_tool_duration_seconds", "Agent tool latency by agent and tool.", ("agent", "tool"))
+agent_handoffs = REGISTRY.counter("agent_handoffs_total", "Swarm handoffs between agents.", ("from_agent", "to_agent"))
+swarm_runs = REGISTRY.counter("swarm_runs_total", "Swarm runs by kind and outcome.", ("kind", "outcome"))
+swarm_run_latency = REGISTRY.histogram("swarm_run_duration_seconds", "Swarm run latency by kind.", ("kind",))
+swarm_run_steps = REGISTRY.histogram(
+    "swarm_run_steps", "Model calls, tool calls, handoffs and SQL statements per Swarm run.", ("kind", "step"), COUNT_BUCKETS,
+)
+
+
+class EndpointLatencyStats:
+    """
+    Request counts, status classes and latency percentiles per "METHOD /route" key.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def record(self, key, seconds, status_code):
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = {"requests": 0, "errors": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=self.window)}
+            stats["requests"] += 1
+            stats["errors"] += status_code >= 500
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["recent"].append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {key: (dict(stats), sorted(stats["recent"])) for key, stats in self.endpoints.items()}
+        result = {}
+        for key, (stats, recent) in sorted(endpoints.items()):
+            result[key] = {
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "mean_ms": round(stats["total"] / stats["requests"] * 1000, 2),
+                "p50_ms": round(percentile(recent, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(recent, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(recent, 0.99) * 1000, 2),
+                "max_ms": round(stats["max"] * 1000, 2),
+            }
+        return result
+
+
+endpoint_latency = EndpointLatencyStats()
+
+
+def init_latency_metrics(app, stats=endpoint_latency):
+    """
+    Times every request that matched a route, for /api/internal/latency and the
+    http_request_* Prometheus metrics. Streaming responses are timed until the response object
+    is returned, not until the stream ends.
+    """
+    @app.before_request
+    def start_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started_at = g.get("request_started_at")
+        if started_at is not None and request.url_rule is not None:
+            seconds = time.perf_counter() - started_at
+            route = request.url_rule.rule
+            stats.record(f"{request.method} {route}", seconds, response.status_code)
+            http_requests.inc(request.method, route, str(response.status_code))
+            http_latency.observe(seconds, request.method, route)
+        return response
+
+
+class RunMetrics:
+    """
+    Totals for one Swarm run, collected on the thread that runs it.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.agent = None
+        self.model_calls = 0
+        self.tool_calls = 0
+        self.handoffs = 0
+        self.db_queries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def to_dict(self):
+        return {
+            "model_calls": self.model_calls,
+            "tool_calls": self.tool_calls,
+            "handoffs": self.handoffs,
+            "db_queries": self.db_queries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+_local = threading.local()
+
+
+def current_run():
+    """
+    Returns the RunMetrics of the Swarm run on this thread, or None.
+    """
+    return getattr(_local, "run", None)
+
+
+@contextmanager
+def instrumented_run(kind):
+    """
+    Collects per-run totals for a Swarm run and records them when it ends.
+    """
+    run = RunMetrics(kind)
+    previous = current_run()
+    _local.run = run
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield run
+        outcome = "ok"
+    finally:
+        _local.run = previous
+        seconds = time.perf_counter() - start
+        swarm_runs.inc(kind, outcome)
+        swarm_run_latency.observe(seconds, kind)
+        for step in ("model_calls", "tool_calls", "handoffs", "db_queries"):
+            swarm_run_steps.observe(getattr(run, step), kind, step)
+        logger.info(f"Swarm {kind} run took {seconds:.2f}s: {run.to_dict()}")
+
+
+def record_model_call(agent, model, seconds, usage=None):
+    llm_calls.inc(agent, model)
+    llm_latency.observe(seconds, agent, model)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if prompt_tokens:
+        llm_tokens.inc(agent, "prompt", amount=prompt_tokens)
+    if completion_tokens:
+        llm_tokens.inc(agent, "completion", amount=completion_tokens)
+    run = current_run()
+    if run is not None:
+        run.agent = agent
+        run.model_calls += 1
+        run.prompt_tokens += prompt_tokens
+        run.completion_tokens += completion_tokens
+
+
+def record_tool_call(agent, tool, seconds, outcome):
+    agent_tool_calls.inc(agent, tool, outcome)
+    agent_tool_latency.observe(seconds, agent, tool)
+    run = current_run()
+    if run is not None:
+        run.tool_calls += 1
+
+
+def record_handoff(from_agent, to_agent):
+    agent_handoffs.inc(from_agent, to_agent)
+    run = current_run()
+    if run is not None:
+        run.handoffs += 1
+
+
+def init_query_metrics(engine, name):
+    """
+    Counts and times every statement the engine executes, and charges it to the current Swarm run.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started_at"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        db_queries.inc(name, operation)
+        db_query_latency.observe(time.perf_counter() - started, name, operation)
+        run = current_run()
+        if run is not None:
+            run.db_queries += 1
+
+    @event.listens_for(engine, "handle_error")
+    def drop_query_timer(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("query_started_at") if context.connection is not None else None
+        if started:
+            started.pop()
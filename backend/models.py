@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -19,6 +19,7 @@ class Course(Base):
     
     id = Column(Integer, primary_key=True)
     course_section = Column(String, unique=True, nullable=False)
+    section_code = Column(String, index=True) # e.g. "CS 3733-D01", how sections are referred to in schedules
     course_title = Column(String, nullable=False)
     subject = Column(String)
     course_description = Column(Text)
@@ -34,6 +35,13 @@ class Course(Base):
     section_status = Column(String)
     waitlist_capacity = Column(String)
     enrolled_capacity = Column(String)
+    # Seat counters parsed from the capacity strings and moved by enrollment.py; a null limit is unlimited
+    enrolled_count = Column(Integer, default=0)
+    enrolled_limit = Column(Integer)
+    waitlist_count = Column(Integer, default=0)
+    waitlist_limit = Column(Integer)
+    meeting_patterns = Column(String) # e.g. "M-T-R-F | 9:00 AM - 9:50 AM", see solver.py
+    source_hash = Column(String) # Hash of the Report_Entry this row was loaded from, used by sync_catalog.py
     department_id = Column(Integer, ForeignKey('departments.id'))
     
     department = relationship("Department", back_populates="courses")
@@ -42,13 +50,23 @@ class Course(Base):
     enrollments = relationship("Enrollment", back_populates="course")
     previous_classes = relationship("StudentClass", back_populates="course")
 
+    # Keyset pagination walks id order within each /api/courses filter
+    __table_args__ = (
+        Index('ix_courses_subject_id', 'subject', 'id'),
+        Index('ix_courses_academic_level_id', 'academic_level', 'id'),
+        Index('ix_courses_offering_period_id', 'offering_period', 'id'),
+        Index('ix_courses_delivery_mode_id', 'delivery_mode', 'id'),
+        Index('ix_courses_section_status_id', 'section_status', 'id'),
+        Index('ix_courses_department_id_id', 'department_id', 'id'),
+    )
+
 
 class Instructor(Base):
     __tablename__ = 'instructors'
     
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    course_id = Column(Integer, ForeignKey('courses.id'))
+    course_id = Column(Integer, ForeignKey('courses.id'), index=True)
     
     course = relationship("Course", back_populates="instructors")
 
@@ -58,7 +76,7 @@ class Location(Base):
     
     id = Column(Integer, primary_key=True)
     location_name = Column(String, nullable=False)
-    course_id = Column(Integer, ForeignKey('courses.id'))
+    course_id = Column(Integer, ForeignKey('courses.id'), index=True)
     
     course = relationship("Course", back_populates="locations")
 
@@ -70,10 +88,19 @@ class Enrollment(Base):
     student_id = Column(Integer, ForeignKey('students.id'), nullable=True)
     course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
     student_cluster = Column(String)
+    status = Column(String) # "enrolled" or "waitlisted", see enrollment.py
+    created_at = Column(DateTime) # Waitlist order
     
     student = relationship("Student", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
 
+    # A student's enrollments, "is this student in this section" lookups (unique, so a student holds
+    # at most one seat per section), and a section's roster
+    __table_args__ = (
+        Index('ix_enrollments_student_id_course_id', 'student_id', 'course_id', unique=True),
+        Index('ix_enrollments_course_id', 'course_id'),
+    )
+
 
 class Student(Base):
     __tablename__ = 'students'
@@ -84,12 +111,14 @@ class Student(Base):
     academic_level = Column(String)
     
     password_hash = Column(String, nullable=False)
+    # Legacy JSON lists, moved into student_classes / student_sports by schema migration 4 and no longer written
     completed_courses = Column(Text, nullable=True)
     sports = Column(Text, nullable=True)
     future_goals = Column(Text, nullable=True)
     
     enrollments = relationship("Enrollment", back_populates="student")
     previous_classes = relationship("StudentClass", back_populates="student")
+    student_sports = relationship("StudentSport", back_populates="student")
 
 
 class StudentClass(Base):
@@ -97,8 +126,55 @@ class StudentClass(Base):
     
     id = Column(Integer, primary_key=True)
     student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
-    course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
+    # Completed courses are picked by title, not section. course_id points at a section with that
+    # title when there is one so sync_catalog.py keeps it, and is null for titles not in the catalog.
+    course_id = Column(Integer, ForeignKey('courses.id'), nullable=True)
+    course_title = Column(String, nullable=False)
     grade = Column(String)
     
     student = relationship("Student", back_populates="previous_classes")
-    course = relationship("Course", back_populates="previous_classes")
\ No newline at end of file
+    course = relationship("Course", back_populates="previous_classes")
+
+    # A student's history, sync_catalog.py checking whether a section is referenced, and the
+    # completed course anti-join in profiles.py
+    __table_args__ = (
+        Index('ix_student_classes_student_id_course_id', 'student_id', 'course_id'),
+        Index('ix_student_classes_course_id', 'course_id'),
+        Index('ix_student_classes_student_id_course_title', 'student_id', 'course_title', unique=True),
+    )
+
+
+class StudentSport(Base):
+    __tablename__ = 'student_sports'
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    name = Column(String, nullable=False)
+
+    student = relationship("Student", back_populates="student_sports")
+
+    __table_args__ = (
+        Index('ix_student_sports_student_id_name', 'student_id', 'name', unique=True),
+    )
+
+
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_version'
+
+    # Single row, bumped every time the catalog loader commits
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+
+class ScheduleCacheEntry(Base):
+    __tablename__ = 'schedule_cache'
+
+    # Memoized schedule results, see schedule_cache.py
+    key = Column(String, primary_key=True)
+    result = Column(Text, nullable=False)
+    model = Column(String)
+    catalog_version = Column(Integer)
+    created_at = Column(Float, nullable=False)
+    last_used_at = Column(Float, nullable=False, index=True)
+    hit_count = Column(Integer, nullable=False, default=0)
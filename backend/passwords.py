@@ -0,0 +1,130 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+
+# Password hashing off the request threads. bcrypt is deliberately slow (about 250 ms of CPU at
+# cost 12), so hashing inline let a burst of logins occupy every web worker. Hashes run on a
+# bounded process pool instead, so login throughput scales with cores and other endpoints keep
+# their threads. When BCRYPT_ROUNDS changes, a successful login re-hashes the password at the new cost.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Number of hashing processes, 0 hashes on the calling thread
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Hashes queued or running at once; callers past this wait up to PASSWORD_HASH_WAIT seconds, then get a 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", max(PASSWORD_HASH_WORKERS, 1) * 8))
+PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", "5"))
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the hashing pool is saturated. status_code is the HTTP status to return.
+    """
+
+    def __init__(self, message="Too many sign-ins right now, please try again shortly", status_code=503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def hash_rounds(password_hash):
+    """
+    Returns the cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it isn't one.
+    """
+    try:
+        return int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def hash_password_now(password, rounds):
+    """
+    Hashes a password on the current thread. Runs inside the worker processes.
+    """
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def check_password_now(password, password_hash, rounds):
+    """
+    Checks a password on the current thread and, if it matches but was hashed at a different cost,
+    also returns a new hash at rounds so the caller needs only one trip to the pool.
+    Returns (matches, new hash or None). Runs inside the worker processes.
+    """
+    if not bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8")):
+        return False, None
+    if hash_rounds(password_hash) != rounds:
+        return True, hash_password_now(password, rounds)
+    return True, None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a process pool with a cap on pending hashes.
+    The pool starts on the first hash or check, so importing app doesn't fork anything; the server
+    calls start() before it begins serving so the first login doesn't wait for the fork. Workers only
+    run bcrypt and leave through os._exit, so the database and HTTP connections they inherit are never
+    used or closed from the child.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, rounds=BCRYPT_ROUNDS,
+                 max_pending=PASSWORD_HASH_MAX_PENDING, wait=PASSWORD_HASH_WAIT):
+        self.workers = workers
+        self.rounds = rounds
+        self.wait = wait
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.executor = None
+        self.counters = {"hashed": 0, "checked": 0, "rehashed": 0, "rejected": 0}
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.workers <= 0 or self.executor is not None:
+            return
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                # ProcessPoolExecutor forks lazily; one call makes it start the workers now
+                self.executor.submit(os.getpid).result()
+
+    def run(self, fn, *args):
+        """
+        Runs fn on the pool and waits for its result. Raises PasswordHasherBusy if no slot frees up in time.
+        """
+        if self.workers <= 0:
+            return fn(*args)
+        if not self.slots.acquire(timeout=self.wait):
+            with self.lock:
+                self.counters["rejected"] += 1
+            raise PasswordHasherBusy()
+        try:
+            self.start()
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password):
+        password_hash = self.run(hash_password_now, password, self.rounds)
+        with self.lock:
+            self.counters["hashed"] += 1
+        return password_hash
+
+    def check(self, password, password_hash):
+        """
+        Returns (matches, new hash or None); a new hash means the stored one should be replaced.
+        """
+        matches, new_hash = self.run(check_password_now, password, password_hash, self.rounds)
+        with self.lock:
+            self.counters["checked"] += 1
+            self.counters["rehashed"] += new_hash is not None
+        return matches, new_hash
+
+    def metrics(self):
+        with self.lock:
+            return {"workers": self.workers, "rounds": self.rounds, **self.counters}
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,106 @@
+from operator import attrgetter
+from sqlalchemy import select, insert, delete, func, exists
+from models import Course, StudentClass, StudentSport
+
+# Student profile lists stored as rows: completed courses in student_classes (by course title)
+# and sports in student_sports. Updates are diffs, so saving an unchanged profile writes nothing.
+# Inserts skip rows that already exist, so two saves of the same profile racing each other both succeed.
+
+# The student columns API responses show, read off a Student in one call (never the password hash)
+PUBLIC_STUDENT_FIELDS = ("id", "name", "email")
+PUBLIC_STUDENT_VALUES = attrgetter(*PUBLIC_STUDENT_FIELDS)
+
+# Used for schedules when the student hasn't picked a level
+DEFAULT_ACADEMIC_LEVEL = "Undergraduate"
+
+
+def public_student(student):
+    """
+    {"id", "name", "email"} for a Student.
+    """
+    return dict(zip(PUBLIC_STUDENT_FIELDS, PUBLIC_STUDENT_VALUES(student)))
+
+
+def academic_levels(db):
+    """
+    The academic levels sections are offered at, sorted. Profiles may only pick one of these.
+    """
+    return db.scalars(
+        select(Course.academic_level).where(Course.academic_level.is_not(None)).distinct().order_by(Course.academic_level)
+    ).all()
+
+
+def clean_list(values):
+    """
+    Drops empty and duplicate entries from a list sent by the client, keeping its order.
+    """
+    return list(dict.fromkeys(str(value).strip() for value in values or [] if value and str(value).strip()))
+
+
+def load_profile_lists(db, student_id):
+    """
+    Returns (completed course titles, sports) in the order they were added.
+    """
+    completed_courses = db.scalars(
+        select(StudentClass.course_title).where(StudentClass.student_id == student_id).order_by(StudentClass.id)
+    ).all()
+    sports = db.scalars(
+        select(StudentSport.name).where(StudentSport.student_id == student_id).order_by(StudentSport.id)
+    ).all()
+    return completed_courses, sports
+
+
+def sync_completed_courses(db, student_id, titles):
+    """
+    Makes the student's completed courses match titles, deleting and inserting only the rows that
+    changed. course_id is resolved to a section with the same title in one query. Returns (added, removed).
+    """
+    titles = clean_list(titles)
+    existing = dict(db.execute(
+        select(StudentClass.course_title, StudentClass.id).where(StudentClass.student_id == student_id)
+    ).all())
+
+    removed = [row_id for title, row_id in existing.items() if title not in titles]
+    added = [title for title in titles if title not in existing]
+    if removed:
+        db.execute(delete(StudentClass).where(StudentClass.id.in_(removed)))
+    if added:
+        course_ids = dict(db.execute(
+            select(Course.course_title, func.min(Course.id))
+            .where(Course.course_title.in_(added))
+            .group_by(Course.course_title)
+        ).all())
+        db.execute(insert(StudentClass).prefix_with("OR IGNORE"), [
+            {"student_id": student_id, "course_title": title, "course_id": course_ids.get(title)}
+            for title in added
+        ])
+    return len(added), len(removed)
+
+
+def sync_sports(db, student_id, names):
+    """
+    Makes the student's sports match names, touching only the rows that changed. Returns (added, removed).
+    """
+    names = clean_list(names)
+    existing = dict(db.execute(
+        select(StudentSport.name, StudentSport.id).where(StudentSport.student_id == student_id)
+    ).all())
+
+    removed = [row_id for name, row_id in existing.items() if name not in names]
+    added = [name for name in names if name not in existing]
+    if removed:
+        db.execute(delete(StudentSport).where(StudentSport.id.in_(removed)))
+    if added:
+        db.execute(insert(StudentSport).prefix_with("OR IGNORE"), [{"student_id": student_id, "name": name} for name in added])
+    return len(added), len(removed)
+
+
+def exclude_completed(stmt, student_id):
+    """
+    Filters a select over courses down to courses the student hasn't completed, as a NOT EXISTS
+    anti-join served by the (student_id, course_title) index.
+    """
+    return stmt.where(~exists().where(
+        StudentClass.student_id == student_id,
+        StudentClass.course_title == Course.course_title,
+    ))
@@ -0,0 +1,32 @@
+from flask import request
+from db import SessionLocal, ReadSessionLocal
+
+# Request-scoped database sessions. Handlers call get_db() / get_read_db() and never close them:
+# init_request_sessions removes both thread-local sessions when the app context ends, whatever
+# path the handler took, which rolls back anything uncommitted and returns the connections to the pool.
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_db():
+    """
+    The request's session on the primary database. Read-only for GET requests, so a read
+    endpoint can't write by accident.
+    """
+    db = SessionLocal()
+    db.info["read_only"] = request.method in SAFE_METHODS
+    return db
+
+
+def get_read_db():
+    """
+    The request's session for catalog reads, on the read engine (see db.py). Always read-only.
+    """
+    return ReadSessionLocal()
+
+
+def init_request_sessions(app):
+    @app.teardown_appcontext
+    def remove_sessions(exception=None):
+        SessionLocal.remove()
+        ReadSessionLocal.remove()
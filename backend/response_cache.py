@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import Response
+from catalog import CatalogVersionWatcher
+from json_provider import dumps_bytes
+from compression import negotiate_encoding, compress_cached
+
+# In-memory cache of serialized catalog responses, keyed by catalog version
+
+
+class CachedResponse:
+    """
+    A pre-serialized JSON body, its compressed copies and a strong ETag.
+    """
+
+    def __init__(self, payload, version):
+        self.body = dumps_bytes(payload)
+        self.etag = f"v{version}-{hashlib.sha1(self.body).hexdigest()[:20]}"
+        # Compressed once per encoding on the first request that asks for it
+        self.encoded_bodies = {}
+
+    def encoded_body(self, encoding):
+        body = self.encoded_bodies.get(encoding)
+        if body is None:
+            body = self.encoded_bodies[encoding] = compress_cached(self.body, encoding)
+        return body
+
+    def to_response(self, request):
+        """
+        Builds a 304 if the client already has this body, otherwise a 200 in the best encoding the client accepts.
+        """
+        if request.if_none_match.contains(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = negotiate_encoding(request.accept_encodings)
+            body = self.encoded_body(encoding) if encoding else self.body
+            response = Response(body, status=200, mimetype="application/json")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+
+        response.set_etag(self.etag)
+        response.headers["Vary"] = "Accept-Encoding"
+        # Browsers revalidate every time, which is a cheap 304 until the catalog changes
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+class CatalogResponseCache:
+    """
+    Bounded LRU of CachedResponse objects. Everything is dropped when the catalog version changes.
+    """
+
+    def __init__(self, get_version, max_entries=256, version_check_interval=1.0):
+        self.version_watcher = CatalogVersionWatcher(get_version, version_check_interval)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def current_version(self):
+        """
+        Returns the catalog version, dropping cached responses if it changed.
+        """
+        version = self.version_watcher.current()
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+        return version
+
+    def invalidate(self):
+        """
+        Drops every cached response and forces a version check on the next request.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+        self.version_watcher.reset()
+
+    def get_or_build(self, args, build, namespace=None):
+        """
+        Returns the cached response for these request args, calling build() to produce the payload on a miss.
+        namespace separates endpoints that share the cache, e.g. the course id of a detail request.
+        """
+        version = self.current_version()
+        key = (version, namespace, tuple(sorted(args.items(multi=True))))
+
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        cached = CachedResponse(build(), version)
+        with self.lock:
+            if version == self.version:
+                self.entries[key] = cached
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return cached
@@ -1,41 +1,89 @@
-import os
 import dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from swarm import Swarm, Agent
+from swarm import Agent
 import logging
-from models import Course, Department
+from course_cache import DepartmentCourseCache
+from course_index import CourseIndexCache
+from agent_context import build_course_context, unfiltered_tool_tokens, format_list, current_meter, metered_instructions, metered_request
+from db import ReadSessionFactory
+from llm_client import get_swarm_client
+from metrics import instrumented_run
 
 dotenv.load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///WPI_COURSES.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = scoped_session(sessionmaker(bind=engine))
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-courses = {}
+# Departments the subject agents pull courses from
+AGENT_DEPARTMENTS = [
+    "Computer Science Department",
+    "Robotics Engineering Department",
+    "Humanities and Arts Department",
+]
+
+# Shared department -> course summaries cache
+department_course_cache = DepartmentCourseCache(ReadSessionFactory)
+
+# Precomputed course vectors for matching goals to courses, see course_index.py
+course_index = CourseIndexCache(ReadSessionFactory)
+
+# How many of the best matching sections to pull from the index per tool call
+GOAL_RETRIEVAL_SECTIONS = 200
 
 # Database helper functions
-def fetch_department_courses(department_name: str):
+def goal_scores(future_goals, department_names):
     """
-    Fetch all courses for a given department.
+    Best index score per course title for the student's goals, or None if there are no goals or no index.
     """
-    db = SessionLocal()
+    if not future_goals:
+        return None
     try:
-        department = db.query(Department).filter(Department.name == department_name).first()
-        if not department:
-            logger.warning(f"Department '{department_name}' not found in the database.")
-            return []
-        courses = db.query(Course).filter(Course.department_id == department.id).all()
-        return [course.course_title for course in courses]
+        index = course_index.get()
     except Exception as e:
-        logger.error(f"Error fetching courses for department '{department_name}': {e}")
-        return []
-    finally:
-        db.close()
+        logger.warning(f"Course index unavailable, falling back to keyword ranking: {e}")
+        return None
+    scores = {}
+    for _, title, score in index.top_k(future_goals, GOAL_RETRIEVAL_SECTIONS, department_names):
+        scores.setdefault(title, score)
+    return scores
+
+def course_tool_result(department_names, context_variables):
+    """
+    Builds a tool result from the courses of the given departments that fit the student,
+    as a compact ranked list within the tool token budget.
+    """
+    summaries = []
+    for department_name in department_names:
+        try:
+            department_summaries = department_course_cache.get(department_name)
+        except Exception as e:
+            logger.error(f"Error fetching courses for department '{department_name}': {e}")
+            continue
+        if not department_summaries:
+            logger.warning(f"Department '{department_name}' not found in the database.")
+        summaries.extend(department_summaries)
+    if not summaries:
+        return "No matching courses available."
+
+    completed_courses = context_variables.get("completedCourses", [])
+    future_goals = context_variables.get("futureGoals", "")
+    result = build_course_context(
+        summaries,
+        completed_courses=completed_courses,
+        academic_level=context_variables.get("academicLevel", "Undergraduate"),
+        future_goals=future_goals,
+        scores=goal_scores(future_goals, department_names),
+    )
+    meter = current_meter()
+    if meter is not None:
+        meter.record_tool_result(result, unfiltered_tool_tokens(summaries, completed_courses))
+    return result
+
+def fetch_department_courses(department_name: str, context_variables=None):
+    """
+    Fetch the courses of a department that fit the student, as a compact ranked list within the tool token budget.
+    """
+    return course_tool_result([department_name], context_variables or {})
 
 # Handoff functions
 def transfer_to_cs_agent():
@@ -57,53 +105,80 @@ def transfer_back_to_router():
 # Subject agents
 cs_agent = Agent(
     name="Computer Science Agent",
-    instructions="""
+    instructions=metered_instructions("""
         You are the Computer Science Advisor. Your task is to help generate a Computer Science course recommendation.
         You have access to functions to fetch Computer Science courses from the database.
         Use 'fetch_cs_courses()' to retrieve available courses.
         Transfer back to the router after giving your recommendations
-        """,
+        """),
     functions=[transfer_back_to_router],
 )
 
 robotics_agent = Agent(
     name="Robotics Agent",
-    instructions="""
+    instructions=metered_instructions("""
         You are the Robotics Engineering Advisor. Your task is to help generate a Robotics course recommendation.
         You have access to functions to fetch Robotics Engineering courses from the database.
         Use 'fetch_robotics_courses()' to retrieve available courses.
         Transfer back to the router after giving your recommendations
-        """,
+        """),
     functions=[transfer_back_to_router],
 )
 
 humanities_agent = Agent(
     name="Humanities Advisor",
-    instructions="""
+    instructions=metered_instructions("""
         You are the Humanities Advisor. Your task is to help generate a Humanities course recommendation.
         You have access to functions to fetch Humanities courses from the database.
         Use 'fetch_humanities_courses()' to retrieve available courses.
         Transfer back to the router after giving your recommendations
-        """,
+        """),
     functions=[transfer_back_to_router],
 )
 
+def format_student_profile(context_variables):
+    """
+    The student's details as readable prompt lines instead of raw Python lists.
+    """
+    return "\n    ".join([
+        f"- Completed courses: {format_list(context_variables.get('completedCourses'))}",
+        f"- Sports: {format_list(context_variables.get('sports'))}",
+        f"- Future goals: {context_variables.get('futureGoals') or 'not given'}",
+    ])
+
 # Router agent to generate the final schedule
 def router_instructions(context_variables):
     """
     Instructions for the Schedule Router to generate a schedule based on context.
+    When the solver found candidate schedules the router only ranks and explains them.
     """
+    candidate_schedules = context_variables.get("candidateSchedules")
+    student_profile = format_student_profile(context_variables)
+    if candidate_schedules:
+        return f"""
+    You are the Schedule Router. Your task is to pick the best course schedule for the student.
+    These candidate schedules were already checked for time conflicts, open seats and completed courses:
+    {candidate_schedules}
+    Pick the option that best fits the student and explain why in a few sentences. Do not recommend courses outside these options
+    and do not transfer to other agents.
+    The user has the following information:
+    {student_profile}
+    Return the final schedule in a clear and structured format, listing each course section exactly as written above.
+    Please indicate that this is your 'final' schedule in your response.
+    There will be no further interactions after this.
+    Wish them good luck on their term or prompt them to click the button below for you to edit their information and allow you to try again.
+    """
+
     return f"""
     You are the Schedule Router. Your task is to generate a course schedule for the student.
     Use the provided context to select appropriate departments and recommend courses.
-    All the departments you have access to are: [{context_variables.get("departmentNames", [])}]
+    All the departments you have access to are: {format_list(context_variables.get("departmentNames"))}
     Select 3 courses total from the available departments, ensuring none are from the student's completed courses.
     If you choose to, you may add a 4th WPE course. These do not count as full courses. Always add this if the user plays a sport.
-    Use the available agents to fetch and recommend courses as needed.
+    Start with find_courses_for_goals() to see the courses that best match the student's goals, then use the
+    available agents to fetch and recommend courses from a department as needed.
     The user has the following information:
-    - {context_variables.get("completedCourses", [])}
-    - {context_variables.get("sports", [])}
-    - {context_variables.get("futureGoals", [])}
+    {student_profile}
     Return the final schedule of 3 courses in a clear and structured format. Please indicate that this is your 'final' schedule in your response.
     There will be no further interactions after this. 
     Wish them good luck on their term or prompt them to click the button below for you to edit their information and allow you to try again.
@@ -111,7 +186,7 @@ def router_instructions(context_variables):
 
 schedule_router = Agent(
     name="Schedule Router",
-    instructions=router_instructions,
+    instructions=metered_instructions(router_instructions),
     functions=[
         transfer_to_cs_agent,
         transfer_to_robotics_agent,
@@ -119,38 +194,84 @@ schedule_router = Agent(
     ],
 )
 
-client = Swarm()
-
 # Agent functions
 
-def fetch_cs_courses():
-    """Returns all computer science courses that the student has not completed."""
-    return fetch_department_courses("Computer Science Department")
+def fetch_cs_courses(context_variables):
+    """Returns the computer science courses most relevant to the student that they have not completed."""
+    return fetch_department_courses("Computer Science Department", context_variables)
+
+def fetch_robotics_courses(context_variables):
+    """Returns the robotics courses most relevant to the student that they have not completed."""
+    return fetch_department_courses("Robotics Engineering Department", context_variables)
 
-def fetch_robotics_courses():
-    """Returns all robotics courses that the student has not completed."""
-    return fetch_department_courses("Robotics Engineering Department")
+def fetch_humanities_courses(context_variables):
+    """Returns the humanities and arts courses most relevant to the student that they have not completed."""
+    return fetch_department_courses("Humanities and Arts Department", context_variables)
 
-def fetch_humanities_courses():
-    """Returns all humanities and arts courses that the student has not completed."""
-    return fetch_department_courses("Humanities and Arts Department")
+def find_courses_for_goals(context_variables):
+    """Returns the courses across all available departments that best match the student's future goals."""
+    return course_tool_result(context_variables.get("departmentNames") or AGENT_DEPARTMENTS, context_variables)
 
 # Attach the functions to the agents
 cs_agent.functions.append(fetch_cs_courses)
 robotics_agent.functions.append(fetch_robotics_courses)
 humanities_agent.functions.append(fetch_humanities_courses)
+schedule_router.functions.append(find_courses_for_goals)
+
+def preload_department_courses():
+    """
+    Warms the course cache and opens the course index so the first schedule request doesn't pay for it.
+    Called at app startup.
+    """
+    try:
+        department_course_cache.preload(AGENT_DEPARTMENTS)
+        course_index.get()
+    except Exception as e:
+        logger.warning(f"Could not preload department courses: {e}")
 
 # Main function to run the Swarm
 def run_swarm(model_override, messages, context_variables):
 
-    swarm_client = Swarm()
+    swarm_client = get_swarm_client()
 
     # Start the swarm with the schedule router
-    response = swarm_client.run(
-        agent=schedule_router,
-        messages=messages,
-        context_variables=context_variables,
-        model_override=model_override
-    )
+    with metered_request(messages), instrumented_run("schedule"):
+        response = swarm_client.run(
+            agent=schedule_router,
+            messages=messages,
+            context_variables=context_variables,
+            model_override=model_override
+        )
+
+    return response.messages[-1]["content"]
+
+# Streaming variant of run_swarm
+def stream_swarm(model_override, messages, context_variables):
+    """
+    Runs the Swarm with streaming enabled. Yields {"type": "token", "content", "sender"} as the
+    model generates text, {"type": "agent", "name"} on handoffs and finally {"type": "done", "content"}
+    with the last message.
+    """
+
+    swarm_client = get_swarm_client()
+
+    with metered_request(messages), instrumented_run("stream"):
+        chunks = swarm_client.run(
+            agent=schedule_router,
+            messages=messages,
+            context_variables=context_variables,
+            model_override=model_override,
+            stream=True,
+        )
 
-    return response.messages[-1]["content"]
\ No newline at end of file
+        current_sender = None
+        for chunk in chunks:
+            if "response" in chunk:
+                yield {"type": "done", "content": chunk["response"].messages[-1]["content"]}
+                return
+            sender = chunk.get("sender")
+            if sender and sender != current_sender:
+                current_sender = sender
+                yield {"type": "agent", "name": sender}
+            if chunk.get("content"):
+                yield {"type": "token", "content": chunk["content"], "sender": sender}
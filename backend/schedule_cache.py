@@ -0,0 +1,154 @@
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from sqlalchemy import select, delete, update, func
+from models import ScheduleCacheEntry
+
+# Persistent cache of generated schedules. Students with the same completed courses, sports
+# and goals get the same schedule back without another Swarm run.
+# Hits are reads only: last_used_at / hit_count are kept in memory and written at most once per
+# touch_interval per entry, or with the next put(), so cache hits don't queue for SQLite's write lock.
+
+logger = logging.getLogger(__name__)
+
+NON_WORD = re.compile(r"[^\w\s]+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_goals(goals):
+    """
+    Lowercases goal text and strips punctuation and repeated whitespace.
+    """
+    return WHITESPACE.sub(" ", NON_WORD.sub(" ", (goals or "").lower())).strip()
+
+
+def schedule_cache_key(user_data, department_names, model, catalog_version):
+    """
+    Canonical hash of everything that influences a generated schedule.
+    """
+    canonical = {
+        "completedCourses": sorted(set(user_data.get("completedCourses") or [])),
+        "sports": sorted(set(user_data.get("sports") or [])),
+        "futureGoals": normalize_goals(user_data.get("futureGoals")),
+        "academicLevel": user_data.get("academicLevel"),
+        "departmentNames": sorted(department_names),
+        "model": model,
+        "catalogVersion": catalog_version,
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ScheduleResultCache:
+    """
+    Schedule results stored in the schedule_cache table with a TTL and LRU eviction.
+    """
+
+    def __init__(self, session_factory, ttl=24 * 3600, max_entries=5000, touch_interval=300):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        # key -> (last used, hits not yet written)
+        self.pending_touches = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached schedule for key, or None if it is missing or expired.
+        Expired rows are left for put() to delete.
+        """
+        now = time.time()
+        db = self.session_factory()
+        try:
+            entry = db.get(ScheduleCacheEntry, key)
+            if entry is None or entry.created_at < now - self.ttl:
+                with self.lock:
+                    self.misses += 1
+                return None
+            result = json.loads(entry.result)
+            last_used_at = entry.last_used_at
+        finally:
+            db.close()
+
+        with self.lock:
+            self.hits += 1
+            _, pending_hits = self.pending_touches.get(key, (now, 0))
+            self.pending_touches[key] = (now, pending_hits + 1)
+            # Only entries that look idle to LRU eviction need their last use written now
+            touch = last_used_at < now - self.touch_interval
+            if touch:
+                touches = {key: self.pending_touches.pop(key)}
+        if touch:
+            self.write_touches(touches)
+        return result
+
+    def take_touches(self):
+        with self.lock:
+            touches, self.pending_touches = self.pending_touches, {}
+        return touches
+
+    def apply_touches(self, db, touches):
+        for key, (last_used_at, hits) in touches.items():
+            db.execute(
+                update(ScheduleCacheEntry)
+                .where(ScheduleCacheEntry.key == key)
+                .values(last_used_at=last_used_at, hit_count=ScheduleCacheEntry.hit_count + hits)
+            )
+
+    def write_touches(self, touches):
+        """
+        Writes batched last-use times and hit counts. Losing them only makes eviction slightly less exact.
+        """
+        db = self.session_factory()
+        try:
+            self.apply_touches(db, touches)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not record schedule cache hits: {e}")
+        finally:
+            db.close()
+
+    def put(self, key, result, model=None, catalog_version=None):
+        """
+        Stores a schedule and evicts the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        db = self.session_factory()
+        try:
+            db.merge(ScheduleCacheEntry(
+                key=key,
+                result=json.dumps(result),
+                model=model,
+                catalog_version=catalog_version,
+                created_at=now,
+                last_used_at=now,
+                hit_count=0,
+            ))
+            db.flush()
+            # Pending hits go out with this write so LRU eviction below sees them
+            self.apply_touches(db, self.take_touches())
+
+            excess = db.scalar(select(func.count()).select_from(ScheduleCacheEntry)) - self.max_entries
+            if excess > 0:
+                oldest = select(ScheduleCacheEntry.key).order_by(ScheduleCacheEntry.last_used_at).limit(excess)
+                db.execute(delete(ScheduleCacheEntry).where(ScheduleCacheEntry.key.in_(oldest)))
+            db.execute(delete(ScheduleCacheEntry).where(ScheduleCacheEntry.created_at < now - self.ttl))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not cache schedule: {e}")
+        finally:
+            db.close()
+
+    def stats(self):
+        """
+        Returns hit/miss counters.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,234 @@
+import json
+import logging
+from sqlalchemy import inspect
+from models import Base
+from search import ensure_search_index
+from enrollment import seat_counters
+from catalog import section_code
+
+# Versioned, non-destructive schema migrations for the SQLite database.
+# The schema version lives in PRAGMA user_version. Every migration runs once, in order, in its own
+# transaction, and must be safe on a fresh database that create_all already built from models.py.
+# To change the schema: update models.py, then append a migration below. Never edit or reorder
+# migrations that have shipped. setup_db.py --reset is still there for a full rebuild.
+
+logger = logging.getLogger(__name__)
+
+
+def add_column(conn, table_name, column_name):
+    """
+    Adds a column declared in models.py to an existing table, if it is missing.
+    SQLite can only add nullable columns without a default, which is what every migration here needs.
+    """
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    if column_name in existing:
+        return
+    column = Base.metadata.tables[table_name].columns[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+    logger.info(f"Added column {table_name}.{column_name}")
+
+
+def create_indexes(conn, table_name, *index_names):
+    """
+    Creates indexes declared in models.py, skipping ones that already exist.
+    """
+    indexes = {index.name: index for index in Base.metadata.tables[table_name].indexes}
+    for index_name in index_names:
+        indexes[index_name].create(conn, checkfirst=True)
+
+
+def migrate_course_schedule_columns(conn):
+    add_column(conn, "courses", "section_code")
+    add_column(conn, "courses", "meeting_patterns")
+    add_column(conn, "courses", "source_hash")
+
+
+def migrate_course_filter_indexes(conn):
+    create_indexes(
+        conn, "courses",
+        "ix_courses_section_code",
+        "ix_courses_subject_id",
+        "ix_courses_academic_level_id",
+        "ix_courses_offering_period_id",
+        "ix_courses_delivery_mode_id",
+        "ix_courses_section_status_id",
+        "ix_courses_department_id_id",
+    )
+    create_indexes(conn, "schedule_cache", "ix_schedule_cache_last_used_at")
+
+
+def migrate_foreign_key_indexes(conn):
+    create_indexes(conn, "instructors", "ix_instructors_course_id")
+    create_indexes(conn, "locations", "ix_locations_course_id")
+    create_indexes(conn, "enrollments", "ix_enrollments_student_id_course_id", "ix_enrollments_course_id")
+    create_indexes(conn, "student_classes", "ix_student_classes_student_id_course_id", "ix_student_classes_course_id")
+
+
+def load_json_list(value):
+    """
+    Parses a legacy JSON list column, treating anything unreadable as empty.
+    """
+    try:
+        values = json.loads(value or "[]")
+    except ValueError:
+        return []
+    return [str(item) for item in values if item] if isinstance(values, list) else []
+
+
+def migrate_profile_lists(conn):
+    # student_classes.course_id becomes nullable and gains course_title. SQLite can't change a
+    # column constraint in place, so the table is rebuilt the documented way: new table, copy, swap.
+    columns = {column["name"] for column in inspect(conn).get_columns("student_classes")}
+    if "course_title" not in columns:
+        conn.exec_driver_sql("""
+            CREATE TABLE student_classes_new (
+                id INTEGER NOT NULL PRIMARY KEY,
+                student_id INTEGER NOT NULL REFERENCES students (id),
+                course_id INTEGER REFERENCES courses (id),
+                course_title VARCHAR NOT NULL,
+                grade VARCHAR
+            )
+        """)
+        conn.exec_driver_sql("""
+            INSERT INTO student_classes_new (id, student_id, course_id, course_title, grade)
+            SELECT sc.id, sc.student_id, sc.course_id, COALESCE(c.course_title, ''), sc.grade
+            FROM student_classes sc LEFT JOIN courses c ON c.id = sc.course_id
+        """)
+        conn.exec_driver_sql("DROP TABLE student_classes")
+        conn.exec_driver_sql("ALTER TABLE student_classes_new RENAME TO student_classes")
+    create_indexes(
+        conn, "student_classes",
+        "ix_student_classes_student_id_course_id",
+        "ix_student_classes_course_id",
+        "ix_student_classes_student_id_course_title",
+    )
+    create_indexes(conn, "student_sports", "ix_student_sports_student_id_name")
+
+    # Move the JSON lists into rows, keeping their order. The JSON columns are left in place.
+    students = conn.exec_driver_sql(
+        "SELECT id, completed_courses, sports FROM students WHERE completed_courses IS NOT NULL OR sports IS NOT NULL"
+    ).all()
+    for student_id, completed_courses, sports in students:
+        for title in dict.fromkeys(load_json_list(completed_courses)):
+            conn.exec_driver_sql(
+                """
+                INSERT OR IGNORE INTO student_classes (student_id, course_id, course_title)
+                VALUES (?, (SELECT MIN(id) FROM courses WHERE course_title = ?), ?)
+                """,
+                (student_id, title, title),
+            )
+        for name in dict.fromkeys(load_json_list(sports)):
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO student_sports (student_id, name) VALUES (?, ?)",
+                (student_id, name),
+            )
+
+
+def migrate_seat_counters(conn):
+    for column_name in ("enrolled_count", "enrolled_limit", "waitlist_count", "waitlist_limit"):
+        add_column(conn, "courses", column_name)
+    add_column(conn, "enrollments", "status")
+    add_column(conn, "enrollments", "created_at")
+
+    # The (student_id, course_id) index becomes unique; enrollments were never written before this
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_enrollments_student_id_course_id")
+    create_indexes(conn, "enrollments", "ix_enrollments_student_id_course_id")
+
+    rows = conn.exec_driver_sql("SELECT id, enrolled_capacity, waitlist_capacity FROM courses").all()
+    if rows:
+        conn.exec_driver_sql(
+            """
+            UPDATE courses SET enrolled_count = :enrolled_count, enrolled_limit = :enrolled_limit,
+                waitlist_count = :waitlist_count, waitlist_limit = :waitlist_limit
+            WHERE id = :id
+            """,
+            [
+                {"id": course_id, **seat_counters(enrolled_capacity, waitlist_capacity)}
+                for course_id, enrolled_capacity, waitlist_capacity in rows
+            ],
+        )
+
+
+def migrate_backfill_section_codes(conn):
+    # Migration 1 added courses.section_code but left it NULL on existing rows, so lookups by code
+    # found nothing until the catalog was reloaded
+    rows = conn.exec_driver_sql("SELECT id, course_section FROM courses WHERE section_code IS NULL").all()
+    if rows:
+        conn.exec_driver_sql(
+            "UPDATE courses SET section_code = :section_code WHERE id = :id",
+            [{"id": course_id, "section_code": section_code(course_section)} for course_id, course_section in rows],
+        )
+
+
+def migrate_resync_meeting_patterns(conn):
+    # Migration 1 added courses.meeting_patterns but nothing can fill it from the rows themselves, so
+    # sections loaded before it have NULL patterns (the solver leaves them out). Clearing their source
+    # hash makes the next sync_catalog.py run rewrite them from the export.
+    conn.exec_driver_sql("UPDATE courses SET source_hash = NULL WHERE meeting_patterns IS NULL")
+
+
+# (version, description, migration). Versions are consecutive, starting at 1.
+MIGRATIONS = [
+    (1, "course section code, meeting patterns and source hash columns", migrate_course_schedule_columns),
+    (2, "course filter and schedule cache indexes", migrate_course_filter_indexes),
+    (3, "indexes on instructor, location, enrollment and student class foreign keys", migrate_foreign_key_indexes),
+    (4, "completed courses and sports as rows instead of JSON", migrate_profile_lists),
+    (5, "integer seat counters and enrollment status", migrate_seat_counters),
+    (6, "section codes for courses loaded before the column existed", migrate_backfill_section_codes),
+    (7, "resync courses loaded before meeting patterns were stored", migrate_resync_meeting_patterns),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine):
+    """
+    Runs every migration newer than the database's schema version. Returns the versions applied.
+    """
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        logger.warning(f"Database schema version {current} is newer than this code ({SCHEMA_VERSION})")
+
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            migration(conn)
+            # PRAGMA doesn't take bound parameters; version is one of our own integers
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+        logger.info(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def check_models_match(engine):
+    """
+    Warns about model columns or indexes that no migration created, which usually means one is missing.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                logger.warning(f"Column {table.name}.{column.name} is in models.py but not in the database, add a migration")
+        for index in table.indexes:
+            if index.name not in indexes:
+                logger.warning(f"Index {index.name} is in models.py but not in the database, add a migration")
+
+
+def ensure_schema(engine):
+    """
+    Brings the database up to date with models.py without dropping anything: creates missing
+    tables, applies pending migrations and sets up the full-text search index.
+    """
+    Base.metadata.create_all(engine)
+    migrate(engine)
+    check_models_match(engine)
+    ensure_search_index(engine)
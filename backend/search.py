@@ -0,0 +1,104 @@
+import re
+from sqlalchemy import text
+
+# Full-text course search backed by an SQLite FTS5 index over the courses table.
+# The index uses courses as external content and is kept in sync by triggers, so
+# fill_db.py, sync_catalog.py and any other writer update it automatically.
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+SEARCH_COLUMNS = ("course_title", "course_description", "subject", "course_tags")
+# bm25 weights, in SEARCH_COLUMNS order. Title matches matter most.
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+SEARCH_TRIGGERS = {
+    "courses_fts_insert": f"""
+        CREATE TRIGGER courses_fts_insert AFTER INSERT ON courses BEGIN
+            INSERT INTO courses_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES (new.id, {", ".join("new." + column for column in SEARCH_COLUMNS)});
+        END
+    """,
+    "courses_fts_delete": f"""
+        CREATE TRIGGER courses_fts_delete AFTER DELETE ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.id, {", ".join("old." + column for column in SEARCH_COLUMNS)});
+        END
+    """,
+    "courses_fts_update": f"""
+        CREATE TRIGGER courses_fts_update AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.id, {", ".join("old." + column for column in SEARCH_COLUMNS)});
+            INSERT INTO courses_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES (new.id, {", ".join("new." + column for column in SEARCH_COLUMNS)});
+        END
+    """,
+}
+
+SEARCH_QUERY = text(f"""
+    SELECT c.id, c.course_section, c.course_title, c.subject, c.offering_period, c.section_status,
+           snippet(courses_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+           bm25(courses_fts, {", ".join(str(weight) for weight in SEARCH_WEIGHTS)}) AS rank
+    FROM courses_fts
+    JOIN courses c ON c.id = courses_fts.rowid
+    WHERE courses_fts MATCH :match
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def ensure_search_index(engine):
+    """
+    Creates the FTS5 table and its sync triggers if they are missing.
+    The index is rebuilt from courses whenever triggers had to be (re)created, since rows
+    may have been written while they didn't exist (e.g. after setup_db.py).
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+                {", ".join(SEARCH_COLUMNS)},
+                content='courses', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        existing = {
+            name for (name,) in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'courses'"
+            )
+        }
+        missing = [name for name in SEARCH_TRIGGERS if name not in existing]
+        for name in missing:
+            conn.exec_driver_sql(SEARCH_TRIGGERS[name])
+        if missing:
+            conn.exec_driver_sql("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+
+
+def build_match_expression(query):
+    """
+    Turns free text into a safe FTS5 expression: every word must match and the last word
+    matches as a prefix, so results update as the user types. Returns None for empty queries.
+    """
+    tokens = TOKEN.findall(query or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_courses(db, query, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    """
+    Returns (ranked results with snippets, next offset or None).
+    """
+    match = build_match_expression(query)
+    if match is None:
+        return [], None
+
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    offset = max(0, offset)
+    rows = db.execute(SEARCH_QUERY, {"match": match, "limit": limit + 1, "offset": offset}).mappings().all()
+
+    has_more = len(rows) > limit
+    results = [dict(row) for row in rows[:limit]]
+    return results, (offset + limit if has_more else None)
@@ -1,14 +1,23 @@
-from sqlalchemy import create_engine
+import argparse
 from models import Base
+from schema import ensure_schema, get_schema_version
+from db import engine
 
-# Database configuration
-DATABASE_URL = 'sqlite:///WPI_COURSES.db'
+# Creates the database or migrates an existing one to the current schema without losing data.
+# Usage: python setup_db.py [--reset]
 
-# Create a database engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+parser = argparse.ArgumentParser(description="Create or migrate the course database")
+parser.add_argument("--reset", action="store_true", help="drop every table first, deleting all courses and students")
+args = parser.parse_args()
 
-# Drop and recreate all tables
-Base.metadata.drop_all(engine)
-Base.metadata.create_all(engine)
+if args.reset:
+    # Drop and recreate all tables, including the full-text search index
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS courses_fts")
+        conn.exec_driver_sql("PRAGMA user_version = 0")
+    Base.metadata.drop_all(engine)
 
-print("Database setup complete.")
+ensure_schema(engine)
+
+with engine.connect() as conn:
+    print(f"Database setup complete (schema version {get_schema_version(conn)}).")
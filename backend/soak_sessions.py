@@ -0,0 +1,53 @@
+import sys
+import time
+import threading
+from flask_jwt_extended import create_access_token
+from db import engine, pool_metrics
+from metrics import rss_mb
+from app import app, password_hasher
+
+# Session soak test: drives the read and write endpoints from short-lived threads (the dev server
+# starts a thread per request) and samples checked-out connections and RSS. Connections must all be
+# back in the pool at the end and RSS should level off; a leak shows up as a steady climb.
+# Usage: python soak_sessions.py [seconds] [threads]
+
+
+def requests_once(client, headers):
+    client.get("/api/courses?limit=20&include=instructors")
+    client.get("/api/courses/search?q=data&limit=5")
+    client.get("/api/get-profile", headers=headers)
+    client.get("/api/courses?exclude_completed=1&limit=5", headers=headers)
+    client.post("/api/update-account", headers=headers, json={"sports": ["Track"], "futureGoals": "soak"})
+    client.get("/api/courses/999999999")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    client = app.test_client()
+    email = f"soak-{time.time_ns()}@example.com"
+    client.post("/api/register", json={"name": "soak", "email": email, "password": "soak"})
+    with app.app_context():
+        student_id = client.post("/api/login", json={"email": email, "password": "soak"}).get_json()["user"]["id"]
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(student_id))}"}
+
+    stop = time.monotonic() + seconds
+    rounds = 0
+    next_sample = time.monotonic()
+    while time.monotonic() < stop:
+        batch = [threading.Thread(target=requests_once, args=(client, headers)) for _ in range(threads)]
+        for thread in batch:
+            thread.start()
+        for thread in batch:
+            thread.join()
+        rounds += 1
+        if time.monotonic() >= next_sample:
+            pool = pool_metrics(engine)
+            print(f"{rounds * threads * 6:>8} requests  rss {rss_mb():7.1f}MB  checked out {pool['checked_out']}  "
+                  f"overflow {pool['overflow']}  wait max {pool['wait_ms_max']}ms")
+            next_sample += max(seconds / 10, 1)
+
+    password_hasher.shutdown()
+    leaked = pool_metrics(engine)["checked_out"]
+    print(f"{'FAIL' if leaked else 'ok  '} {leaked} connections still checked out after {rounds * threads * 6} requests")
+    sys.exit(1 if leaked else 0)
@@ -0,0 +1,451 @@
+import re
+import time
+import heapq
+import logging
+import threading
+from sqlalchemy import select
+from models import Course
+from catalog import CatalogVersionWatcher, get_catalog_version
+
+# Deterministic schedule solver. Picks N open, non-completed sections with no meeting time
+# conflicts, plus a WPE section for athletes, and scores them against the student's goals.
+# Conflicts are precomputed once per catalog version as bitsets over candidate indexes, so
+# checking a combination is a couple of integer ANDs.
+
+logger = logging.getLogger(__name__)
+
+WPE_SUBJECT = "Wellness and Physical Education"
+OPEN_STATUS = "Open"
+SLOT_MINUTES = 10
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_INDEX = {"M": 0, "T": 1, "W": 2, "R": 3, "F": 4, "S": 5, "U": 6}
+
+MEETING = re.compile(r"([MTWRFSU](?:-[MTWRFSU])*)\s*\|\s*(\d{1,2}):(\d\d)\s*([AP]M)\s*-\s*(\d{1,2}):(\d\d)\s*([AP]M)")
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "and", "the", "for", "with", "want", "would", "like", "into", "about", "from", "that", "this",
+    "have", "will", "work", "career", "become", "take", "more", "some", "also", "are", "but", "not",
+    "course", "courses", "students", "student", "introduction", "intro",
+}
+
+TITLE_WEIGHT = 3.0
+TAG_WEIGHT = 1.5
+DESCRIPTION_WEIGHT = 0.5
+OPEN_SEATS_BONUS = 0.25
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens without stopwords or very short words.
+    """
+    return {token for token in TOKEN.findall((text or "").lower()) if len(token) > 2 and token not in STOPWORDS}
+
+
+def to_minutes(hour, minute, meridiem):
+    hour = int(hour) % 12 + (12 if meridiem == "PM" else 0)
+    return hour * 60 + int(minute)
+
+
+def meeting_mask(meeting_patterns):
+    """
+    Converts Workday meeting patterns into a bitset of 10 minute slots across the week.
+    Sections without meeting times (online, thesis, ...) get 0 and never conflict.
+    """
+    mask = 0
+    for days, start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem in MEETING.findall(meeting_patterns or ""):
+        start_slot = to_minutes(start_hour, start_minute, start_meridiem) // SLOT_MINUTES
+        end_slot = -(-to_minutes(end_hour, end_minute, end_meridiem) // SLOT_MINUTES)
+        if end_slot <= start_slot:
+            continue
+        span = ((1 << (end_slot - start_slot)) - 1) << start_slot
+        for day in days.split("-"):
+            mask |= span << (DAY_INDEX[day] * SLOTS_PER_DAY)
+    return mask
+
+
+def parse_capacity(capacity):
+    """
+    Parses an "enrolled/capacity" string, returning (enrolled, capacity) or None.
+    """
+    try:
+        enrolled, total = (capacity or "").split("/")
+        return int(enrolled), int(total)
+    except ValueError:
+        return None
+
+
+def course_code(course_title):
+    """
+    "CS 3733 - Software Engineering" -> "CS 3733"
+    """
+    return course_title.split(" - ", 1)[0].strip()
+
+
+def iter_bits(mask):
+    """
+    Yields the index of every set bit.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def seat_availability(row):
+    """
+    (has a free seat, seat count is known) for a section. Uses the live counters that enrolling and
+    dropping move, and the export's "enrolled/capacity" string only when the counters were never set.
+    A null limit with counters set means unlimited, like an unreadable capacity string.
+    """
+    if row.enrolled_count is None and row.enrolled_limit is None:
+        capacity = parse_capacity(row.enrolled_capacity)
+        has_seats = capacity is None or capacity[0] < capacity[1]
+        return has_seats, capacity is not None and has_seats
+    if row.enrolled_limit is None:
+        return True, False
+    has_seats = (row.enrolled_count or 0) < row.enrolled_limit
+    return has_seats, has_seats
+
+
+class SolverIndex:
+    """
+    Candidate sections for one catalog version with precomputed conflict and attribute bitsets.
+    Bit i of every mask refers to self.sections[i]. Seat availability (open_mask, open_seats)
+    changes with every enrollment and is refreshed separately with apply_seats.
+    """
+
+    def __init__(self, rows, catalog_version=None):
+        self.catalog_version = catalog_version
+        self.sections = []
+        self.title_tokens = []
+        self.tag_tokens = []
+        self.description_tokens = []
+        self.open_seats = []
+        self.open_mask = 0
+        self.positions = {}
+        self.wpe_mask = 0
+        self.credit_mask = 0
+        self.level_masks = {}
+        self.period_masks = {}
+        self.title_masks = {}
+        # Sections whose meeting patterns were never loaded (rows from before the column existed).
+        # Their times are unknown, so they are left out rather than treated as never conflicting.
+        self.unknown_times_mask = 0
+
+        slot_members = {}
+        date_members = {}
+        code_members = {}
+        section_slots = []
+        section_dates = []
+
+        for index, row in enumerate(rows):
+            bit = 1 << index
+            section = {
+                "id": row.id,
+                "course_section": row.course_section,
+                "course_title": row.course_title,
+                "subject": row.subject,
+                "credits": row.credits or 0.0,
+                "offering_period": row.offering_period,
+                "meeting_patterns": row.meeting_patterns or "",
+                "section_status": row.section_status,
+                "academic_units": row.academic_units or "",
+            }
+            self.sections.append(section)
+            self.positions[row.id] = index
+            self.title_tokens.append(tokenize(row.course_title))
+            self.tag_tokens.append(tokenize(row.course_tags))
+            self.description_tokens.append(tokenize(row.course_description))
+
+            if row.subject == WPE_SUBJECT:
+                self.wpe_mask |= bit
+            if (row.credits or 0) > 0:
+                self.credit_mask |= bit
+            self.level_masks[row.academic_level] = self.level_masks.get(row.academic_level, 0) | bit
+            self.period_masks[row.offering_period] = self.period_masks.get(row.offering_period, 0) | bit
+            self.title_masks[row.course_title] = self.title_masks.get(row.course_title, 0) | bit
+
+            code = course_code(row.course_title)
+            code_members[code] = code_members.get(code, 0) | bit
+
+            if row.meeting_patterns is None:
+                self.unknown_times_mask |= bit
+            slots = meeting_mask(row.meeting_patterns)
+            section_slots.append(slots)
+            for slot in iter_bits(slots):
+                slot_members[slot] = slot_members.get(slot, 0) | bit
+
+            dates = (row.start_date, row.end_date)
+            section_dates.append(dates)
+            date_members[dates] = date_members.get(dates, 0) | bit
+
+        self.apply_seats(rows)
+
+        if self.unknown_times_mask:
+            logger.error(
+                f"{bin(self.unknown_times_mask).count('1')} sections have no meeting patterns loaded and are left out "
+                f"of schedules; run sync_catalog.py to load them"
+            )
+
+        # Sections whose date ranges overlap, grouped by distinct range
+        overlapping_dates = {}
+        for dates in date_members:
+            mask = 0
+            for other, members in date_members.items():
+                if self.dates_overlap(dates, other):
+                    mask |= members
+            overlapping_dates[dates] = mask
+
+        # conflicts[i]: sections that can't be taken with section i
+        self.conflicts = []
+        for index, row in enumerate(rows):
+            time_conflicts = 0
+            for slot in iter_bits(section_slots[index]):
+                time_conflicts |= slot_members[slot]
+            conflicts = (time_conflicts & overlapping_dates[section_dates[index]]) | code_members[course_code(row.course_title)]
+            self.conflicts.append(conflicts & ~(1 << index))
+
+    def apply_seats(self, rows):
+        """
+        Recomputes which sections are open with free seats from rows of
+        (id, section_status, enrolled_count, enrolled_limit, enrolled_capacity).
+        """
+        open_mask = 0
+        open_seats = [False] * len(self.sections)
+        for row in rows:
+            index = self.positions.get(row.id)
+            if index is None:
+                continue
+            has_seats, known_free = seat_availability(row)
+            open_seats[index] = known_free
+            if row.section_status == OPEN_STATUS and has_seats:
+                open_mask |= 1 << index
+        self.open_mask, self.open_seats = open_mask, open_seats
+
+    @staticmethod
+    def dates_overlap(first, second):
+        """
+        True when two (start, end) date ranges overlap. Missing dates are treated as overlapping.
+        """
+        (first_start, first_end), (second_start, second_end) = first, second
+        if None in (first_start, first_end, second_start, second_end):
+            return True
+        return first_start <= second_end and second_start <= first_end
+
+    def mask_for_titles(self, titles):
+        """
+        Bitset of every section whose course title is in titles.
+        """
+        mask = 0
+        for title in titles:
+            mask |= self.title_masks.get(title, 0)
+        return mask
+
+    def mask_for_departments(self, department_names):
+        """
+        Bitset of sections offered by any of the departments (academic_units may list several).
+        """
+        mask = 0
+        for index, section in enumerate(self.sections):
+            units = section["academic_units"]
+            if any(name in units for name in department_names):
+                mask |= 1 << index
+        return mask
+
+    def score(self, index, goal_tokens):
+        """
+        Relevance of a section to the student's goals, with a small bonus for open seats.
+        """
+        score = OPEN_SEATS_BONUS if self.open_seats[index] else 0.0
+        if goal_tokens:
+            score += TITLE_WEIGHT * len(goal_tokens & self.title_tokens[index])
+            score += TAG_WEIGHT * len(goal_tokens & self.tag_tokens[index])
+            score += DESCRIPTION_WEIGHT * len(goal_tokens & self.description_tokens[index])
+        return score
+
+
+class ScheduleSolver:
+    """
+    Builds schedules from a SolverIndex that is rebuilt whenever the catalog version changes.
+    """
+
+    def __init__(self, session_factory, version_check_interval=5.0, seat_max_age=2.0):
+        self.session_factory = session_factory
+        self.version_watcher = CatalogVersionWatcher(self.read_version, version_check_interval)
+        self.cached_index = None
+        # Seats move with every enrollment without a catalog version bump; like SeatCache, they are
+        # re-read when older than seat_max_age
+        self.seat_max_age = seat_max_age
+        self.seats_loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def read_version(self):
+        db = self.session_factory()
+        try:
+            return get_catalog_version(db)
+        finally:
+            db.close()
+
+    def index(self):
+        """
+        Returns the SolverIndex for the current catalog version, building it if needed.
+        """
+        version = self.version_watcher.current()
+        with self.lock:
+            if self.cached_index is None or self.cached_index.catalog_version != version:
+                db = self.session_factory()
+                try:
+                    rows = db.execute(select(
+                        Course.id, Course.course_section, Course.course_title, Course.subject,
+                        Course.course_description, Course.course_tags, Course.credits, Course.academic_level,
+                        Course.offering_period, Course.start_date, Course.end_date, Course.meeting_patterns,
+                        Course.section_status, Course.enrolled_capacity, Course.academic_units,
+                        Course.enrolled_count, Course.enrolled_limit,
+                    ).order_by(Course.id)).all()
+                finally:
+                    db.close()
+                start = time.perf_counter()
+                self.cached_index = SolverIndex(rows, version)
+                self.seats_loaded_at = time.monotonic()
+                logger.info(f"Built solver index for {len(rows)} sections in {time.perf_counter() - start:.3f}s")
+            elif time.monotonic() - self.seats_loaded_at >= self.seat_max_age:
+                db = self.session_factory()
+                try:
+                    seat_rows = db.execute(select(
+                        Course.id, Course.section_status, Course.enrolled_count, Course.enrolled_limit,
+                        Course.enrolled_capacity,
+                    )).all()
+                finally:
+                    db.close()
+                self.cached_index.apply_seats(seat_rows)
+                self.seats_loaded_at = time.monotonic()
+            return self.cached_index
+
+    def solve(self, completed_courses=(), sports=(), future_goals="", department_names=(),
+              academic_level="Undergraduate", course_count=3, max_credits=12.0, top_k=5, max_nodes=50000):
+        """
+        Returns up to top_k schedules, best first. Each schedule is
+        {"score", "offering_period", "total_credits", "sections": [...], "wpe": section or None}.
+        Schedules are built within a single offering period and never repeat the same set of courses.
+        """
+        index = self.index()
+        goal_tokens = tokenize(future_goals)
+        completed_mask = index.mask_for_titles(completed_courses)
+
+        eligible = index.open_mask & index.credit_mask & ~completed_mask & ~index.wpe_mask & ~index.unknown_times_mask
+        if academic_level:
+            eligible &= index.level_masks.get(academic_level, 0)
+        if department_names:
+            eligible &= index.mask_for_departments(department_names)
+
+        # Athletes get their own sport's sections first, then any open WPE section
+        sport_mask = index.mask_for_titles(sports) & index.wpe_mask
+        wpe_candidates = ((index.open_mask & index.wpe_mask & ~completed_mask) | sport_mask) & ~index.unknown_times_mask
+
+        schedules = []
+        for period, period_mask in index.period_masks.items():
+            candidates = eligible & period_mask
+            if bin(candidates).count("1") < course_count:
+                continue
+            for score, chosen in self.search(index, candidates, goal_tokens, course_count, max_credits, top_k, max_nodes):
+                wpe = None
+                if sports:
+                    wpe = self.pick_wpe(index, chosen, wpe_candidates & period_mask, sport_mask)
+                schedules.append(self.describe(index, score, chosen, wpe, period))
+
+        schedules.sort(key=lambda schedule: (-schedule["score"], [section["id"] for section in schedule["sections"]]))
+        return schedules[:top_k]
+
+    def search(self, index, candidates, goal_tokens, course_count, max_credits, top_k, max_nodes):
+        """
+        Branch and bound over candidates ordered by score. Returns [(score, [indexes])] best first.
+        """
+        order = sorted(iter_bits(candidates), key=lambda i: (-index.score(i, goal_tokens), i))
+        scores = [index.score(i, goal_tokens) for i in order]
+        best = [] # min-heap of (score, tiebreak, chosen)
+        seen_course_sets = set()
+        nodes = 0
+
+        def bound(position, remaining):
+            return sum(scores[position:position + remaining])
+
+        def visit(position, chosen, blocked, credits, score):
+            nonlocal nodes
+            nodes += 1
+            if len(chosen) == course_count:
+                course_set = frozenset(course_code(index.sections[i]["course_title"]) for i in chosen)
+                if course_set in seen_course_sets:
+                    return
+                seen_course_sets.add(course_set)
+                entry = (score, -len(seen_course_sets), list(chosen))
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heappushpop(best, entry)
+                return
+
+            remaining = course_count - len(chosen)
+            for position in range(position, len(order) - remaining + 1):
+                if nodes >= max_nodes:
+                    return
+                if len(best) == top_k and score + bound(position, remaining) <= best[0][0]:
+                    return
+                candidate = order[position]
+                if blocked >> candidate & 1:
+                    continue
+                candidate_credits = index.sections[candidate]["credits"]
+                if credits + candidate_credits > max_credits:
+                    continue
+                chosen.append(candidate)
+                visit(position + 1, chosen, blocked | index.conflicts[candidate], credits + candidate_credits, score + scores[position])
+                chosen.pop()
+
+        visit(0, [], 0, 0.0, 0.0)
+        if nodes >= max_nodes:
+            logger.info(f"Solver stopped after {nodes} nodes")
+        return [(score, chosen) for score, _, chosen in sorted(best, reverse=True)]
+
+    @staticmethod
+    def pick_wpe(index, chosen, wpe_candidates, sport_mask):
+        """
+        First WPE section that fits around the chosen sections, preferring the student's sport.
+        """
+        blocked = 0
+        for i in chosen:
+            blocked |= index.conflicts[i] | (1 << i)
+        free = wpe_candidates & ~blocked
+        for mask in (free & sport_mask, free):
+            for i in iter_bits(mask):
+                return i
+        return None
+
+    @staticmethod
+    def describe(index, score, chosen, wpe, period):
+        """
+        Serializes a solved schedule.
+        """
+        sections = [index.sections[i] for i in chosen]
+        return {
+            "score": round(score, 3),
+            "offering_period": period,
+            "total_credits": sum(section["credits"] for section in sections),
+            "sections": [{key: value for key, value in section.items() if key != "academic_units"} for section in sections],
+            "wpe": {key: value for key, value in index.sections[wpe].items() if key != "academic_units"} if wpe is not None else None,
+        }
+
+
+def format_candidates(schedules):
+    """
+    Compact text version of solved schedules for the LLM prompt.
+    """
+    lines = []
+    for number, schedule in enumerate(schedules, start=1):
+        sections = "; ".join(
+            f"{section['course_section']} [{section['meeting_patterns'] or 'no set meeting time'}]"
+            for section in schedule["sections"]
+        )
+        line = f"Option {number} ({schedule['offering_period']}, {schedule['total_credits']:g} credits): {sections}"
+        if schedule["wpe"]:
+            line += f"; WPE: {schedule['wpe']['course_section']}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,45 @@
+import time
+import threading
+from swarm import Swarm
+from swarm.types import Response
+from metrics import record_model_call, record_tool_call, record_handoff
+
+# Swarm client that reports every model completion, tool call and handoff to metrics.py.
+# Swarm runs one agent's completion and then its tool calls on the same thread, so the agent
+# that issued a tool call is remembered per thread between the two.
+
+
+class InstrumentedSwarm(Swarm):
+    def __init__(self, client=None):
+        super().__init__(client=client)
+        self.local = threading.local()
+
+    def get_chat_completion(self, agent, history, context_variables, model_override, stream, debug):
+        self.local.agent = agent.name
+        start = time.perf_counter()
+        completion = super().get_chat_completion(agent, history, context_variables, model_override, stream, debug)
+        # Streamed completions carry no usage and are timed to the first chunk
+        record_model_call(agent.name, model_override or agent.model, time.perf_counter() - start, getattr(completion, "usage", None))
+        return completion
+
+    def handle_tool_calls(self, tool_calls, functions, context_variables, debug):
+        """
+        Runs the tool calls one at a time through Swarm's own handler so each can be timed,
+        merging the results the way Swarm does.
+        """
+        agent = getattr(self.local, "agent", None) or "unknown"
+        response = Response(messages=[], agent=None, context_variables={})
+        for tool_call in tool_calls:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                partial = super().handle_tool_calls([tool_call], functions, context_variables, debug)
+                outcome = "handoff" if partial.agent else "ok"
+            finally:
+                record_tool_call(agent, tool_call.function.name, time.perf_counter() - start, outcome)
+            response.messages.extend(partial.messages)
+            response.context_variables.update(partial.context_variables)
+            if partial.agent:
+                record_handoff(agent, partial.agent.name)
+                response.agent = partial.agent
+        return response
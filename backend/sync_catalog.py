@@ -0,0 +1,157 @@
+import time
+import logging
+from sqlalchemy import select, insert, update, delete, or_
+from sqlalchemy.orm import Session
+from models import Course, Instructor, Location, Enrollment, StudentClass
+from description_cleaner import CLEAN_WORKERS, iter_cleaned_chunks
+from schema import ensure_schema
+from catalog import bump_catalog_version
+from course_index import write_course_index
+from enrollment import recount_seats
+from db import create_db_engine
+from fill_db import (
+    DATABASE_URL, COURSES_FILE, CHUNK_SIZE, iter_report_entries, chunked, entry_hash,
+    build_course_row, build_child_rows, load_department_map, ensure_departments, bulk_load_entries,
+)
+
+# Incremental catalog sync. Unlike setup_db.py + fill_db.py this never touches
+# students or enrollments, so it is safe to run while registration is open.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REMOVED_STATUS = "Removed"
+
+
+def replace_children(session, entries, course_ids):
+    """
+    Swaps out the instructors and locations of updated courses.
+    """
+    session.execute(delete(Instructor).where(Instructor.course_id.in_(course_ids)))
+    session.execute(delete(Location).where(Location.course_id.in_(course_ids)))
+    instructor_rows, location_rows = build_child_rows(entries, course_ids)
+    if instructor_rows:
+        session.execute(insert(Instructor), instructor_rows)
+    if location_rows:
+        session.execute(insert(Location), location_rows)
+
+
+def remove_sections(session, course_ids):
+    """
+    Deletes sections that are no longer in the export. Sections that students are enrolled in or
+    have completed are kept and marked as removed so their history stays intact. Returns (deleted, kept).
+    """
+    if not course_ids:
+        return 0, 0
+
+    referenced = set(session.scalars(
+        select(Course.id).where(
+            Course.id.in_(course_ids),
+            or_(
+                Course.id.in_(select(Enrollment.course_id)),
+                Course.id.in_(select(StudentClass.course_id)),
+            ),
+        )
+    ))
+    deletable = [course_id for course_id in course_ids if course_id not in referenced]
+
+    if deletable:
+        session.execute(delete(Instructor).where(Instructor.course_id.in_(deletable)))
+        session.execute(delete(Location).where(Location.course_id.in_(deletable)))
+        session.execute(delete(Course).where(Course.id.in_(deletable)))
+    if referenced:
+        session.execute(
+            update(Course)
+            .where(Course.id.in_(referenced))
+            .values(section_status=REMOVED_STATUS, source_hash=None)
+        )
+    return len(deletable), len(referenced)
+
+
+def sync_catalog(engine, entries, chunk_size=CHUNK_SIZE, workers=CLEAN_WORKERS):
+    """
+    Upserts Report_Entry records keyed on Course.course_section in a single transaction.
+    Only sections whose entry hash changed are rewritten and sections missing from the export are removed.
+    Returns a dict of counts.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "kept": 0}
+
+    with Session(engine) as session, session.begin():
+        department_map = load_department_map(session)
+        existing = {
+            section: (course_id, source_hash, section_status)
+            for course_id, section, source_hash, section_status in session.execute(
+                select(Course.id, Course.course_section, Course.source_hash, Course.section_status)
+            )
+        }
+        seen = set()
+
+        for chunk, descriptions in iter_cleaned_chunks(chunked(entries, chunk_size), workers):
+            new_entries, new_descriptions = [], []
+            changed_entries, changed_rows = [], []
+
+            for entry, description in zip(chunk, descriptions):
+                section = entry["Course_Section"]
+                seen.add(section)
+
+                if section not in existing:
+                    new_entries.append(entry)
+                    new_descriptions.append(description)
+                    continue
+
+                course_id, source_hash, _ = existing[section]
+                if source_hash == entry_hash(entry):
+                    stats["unchanged"] += 1
+                    continue
+
+                changed_entries.append(entry)
+                changed_rows.append((course_id, description))
+
+            bulk_load_entries(session, new_entries, department_map, new_descriptions)
+            stats["inserted"] += len(new_entries)
+
+            if changed_entries:
+                ensure_departments(session, changed_entries, department_map)
+                session.execute(update(Course), [
+                    {
+                        "id": course_id,
+                        **build_course_row(entry, department_map[entry.get("Academic_Units", "").strip()], description),
+                    }
+                    for entry, (course_id, description) in zip(changed_entries, changed_rows)
+                ])
+                changed_ids = [course_id for course_id, _ in changed_rows]
+                replace_children(session, changed_entries, changed_ids)
+                # The rows above reset the seat counters to the export's numbers
+                recount_seats(session, changed_ids)
+                stats["updated"] += len(changed_entries)
+
+        # Sections already kept as removed by an earlier sync are left alone, so a sync that
+        # changed nothing doesn't rewrite them or bump the catalog version
+        removed_ids = [
+            course_id for section, (course_id, _, section_status) in existing.items()
+            if section not in seen and section_status != REMOVED_STATUS
+        ]
+        stats["deleted"], stats["kept"] = remove_sections(session, removed_ids)
+
+        if stats["inserted"] or stats["updated"] or stats["deleted"] or stats["kept"]:
+            bump_catalog_version(session)
+
+    return stats
+
+
+if __name__ == "__main__":
+    engine = create_db_engine(DATABASE_URL)
+    ensure_schema(engine)
+
+    start = time.perf_counter()
+    stats = sync_catalog(engine, iter_report_entries(COURSES_FILE))
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Catalog sync complete in {elapsed:.2f}s: {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['deleted']} deleted, {stats['kept']} removed but kept for enrolled students."
+    )
+
+    # Rebuilt every time so the index also exists after a sync that changed nothing
+    index = write_course_index(engine)
+    logger.info(f"Course index rebuilt for {len(index.ids)} sections.")
@@ -0,0 +1,49 @@
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+# The backend modules import flat (from db import ...) and db.py opens DATABASE_URL at import, so the
+# backend directory goes on sys.path and DATABASE_URL points at a scratch database before any test
+# module is collected. The tracked WPI_COURSES.db is never touched.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="wpi-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'test.db')}"
+os.environ["COURSE_INDEX_PATH"] = os.path.join(SCRATCH_DIR, "course_index")
+os.environ.pop("READ_DATABASE_URL", None)
+
+# Enough sections for a full MAX_PAGE_SIZE page in every query budget
+CATALOG_COURSES = 1200
+
+
+@pytest.fixture(scope="session")
+def catalog_engine():
+    """
+    The scratch database with the schema migrated and a synthetic catalog loaded through fill_db.py.
+    """
+    from db import engine
+    from schema import ensure_schema
+    from fill_db import load_catalog
+    from bench_e2e import synthetic_entries
+
+    ensure_schema(engine)
+    load_catalog(engine, synthetic_entries(CATALOG_COURSES), workers=1)
+    yield engine
+    engine.dispose()
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(catalog_engine):
+    from db import SessionFactory
+
+    session = SessionFactory()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
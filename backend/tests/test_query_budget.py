@@ -0,0 +1,38 @@
+import pytest
+from catalog import MAX_PAGE_SIZE
+from check_queries import QUERY_BUDGETS, measure, run_hot_paths, full_scans
+
+# The check_queries.py guards as tests on a seeded scratch database: N+1 budgets for the hot read
+# paths, and EXPLAIN QUERY PLAN of every statement they run, which must hit an index (the
+# (column, id) keyset indexes on courses, the course_id indexes on instructors, locations and
+# enrollments, and the student_classes lookup indexes).
+
+
+@pytest.fixture(scope="module")
+def measured(catalog_engine):
+    from db import SessionFactory
+
+    session = SessionFactory()
+    try:
+        return measure(session, MAX_PAGE_SIZE)
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.mark.parametrize("path", sorted(QUERY_BUDGETS))
+def test_read_path_stays_within_query_budget(measured, path):
+    statements, rows = measured[path]
+    assert rows == MAX_PAGE_SIZE
+    assert statements <= QUERY_BUDGETS[path]
+
+
+def test_hot_queries_use_indexes(db):
+    statements = run_hot_paths(db)
+    assert statements
+    scans = {
+        " ".join(statement.split()): steps
+        for statement, parameters in statements
+        if (steps := full_scans(db, statement, parameters))
+    }
+    assert scans == {}
@@ -0,0 +1,42 @@
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from db import create_db_engine
+from schema import ensure_schema
+from fill_db import load_catalog
+from models import Course, Enrollment
+from catalog import get_catalog_version
+from sync_catalog import sync_catalog, REMOVED_STATUS
+from bench_e2e import synthetic_entries
+
+# Incremental sync against its own scratch database, since it rewrites the catalog.
+
+
+def catalog_version(engine):
+    with Session(engine) as session:
+        return get_catalog_version(session)
+
+
+def test_unchanged_export_keeps_removed_section_and_catalog_version(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    ensure_schema(engine)
+    entries = list(synthetic_entries(40))
+    load_catalog(engine, entries, workers=1)
+
+    dropped = entries[0]["Course_Section"]
+    with Session(engine) as session, session.begin():
+        course_id = session.scalar(select(Course.id).where(Course.course_section == dropped))
+        session.execute(insert(Enrollment).values(course_id=course_id, status="enrolled"))
+
+    export = entries[1:]
+    first = sync_catalog(engine, export, workers=1)
+    assert first["kept"] == 1
+    version = catalog_version(engine)
+
+    for _ in range(2):
+        stats = sync_catalog(engine, export, workers=1)
+        assert stats == {"inserted": 0, "updated": 0, "unchanged": len(export), "deleted": 0, "kept": 0}
+        assert catalog_version(engine) == version
+
+    with Session(engine) as session:
+        assert session.scalar(select(Course.section_status).where(Course.id == course_id)) == REMOVED_STATUS
+    engine.dispose()
@@ -27,34 +27,44 @@ export const CourseProvider = ({ children }) => {
         });
     };
 
-    // Fetch courses from backend
-    const fetchCourses = () => {
-        setLoadingCourses(true);
-        fetch('/api/courses', {
+    // Fetch one page of courses from backend
+    const fetchCoursePage = (cursor) => {
+        const params = new URLSearchParams({ fields: 'id,course_section,course_title', limit: '500' });
+        if (cursor) params.set('cursor', cursor);
+        return fetch(`/api/courses?${params}`, {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json',
                 'Authorization': `Bearer ${jwtToken}`,
             },
-        })
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error('Failed to fetch courses');
-                }
-                return response.json();
-            })
-            .then(data => {
-                console.log("Fetched Courses:", data.courses);
-                const distinctCourses = filterDistinctCourses(data.courses);
-                setCourses(distinctCourses);
-            })
-            .catch(err => {
-                console.error(err);
-                setErrorCourses(err.message);
-            })
-            .finally(() => {
-                setLoadingCourses(false);
-            });
+        }).then(response => {
+            if (!response.ok) {
+                throw new Error('Failed to fetch courses');
+            }
+            return response.json();
+        });
+    };
+
+    // Fetch courses from backend, following the cursor through every page
+    const fetchCourses = async () => {
+        setLoadingCourses(true);
+        try {
+            const allCourses = [];
+            let cursor = null;
+            do {
+                const data = await fetchCoursePage(cursor);
+                allCourses.push(...data.courses);
+                cursor = data.next_cursor;
+            } while (cursor);
+            console.log("Fetched Courses:", allCourses);
+            const distinctCourses = filterDistinctCourses(allCourses);
+            setCourses(distinctCourses);
+        } catch (err) {
+            console.error(err);
+            setErrorCourses(err.message);
+        } finally {
+            setLoadingCourses(false);
+        }
     };
 
     // Fetch data on mount or when user changes
@@ -5,7 +5,7 @@ import { CourseContext } from '../contexts/CourseContext';
 import { toast } from 'react-toastify';
 
 const AccountPage = () => {
-    const { user, jwtToken, logoutUser } = useContext(AuthContext);
+    const { user, jwtToken, logoutUser, fetchUserProfile } = useContext(AuthContext);
     const { academicCourses, sportsCourses, fetchCourses } = useContext(CourseContext);
 
     // Local states to allow editing
@@ -15,6 +15,9 @@ const AccountPage = () => {
     const [completedCourses, setCompletedCourses] = useState(user?.completedCourses || []);
     const [sports, setSports] = useState(user?.sports || []);
     const [futureGoals, setFutureGoals] = useState(user?.futureGoals || '');
+    const [academicLevel, setAcademicLevel] = useState(user?.academicLevel || '');
+    const [academicLevels, setAcademicLevels] = useState([]);
+    const [defaultAcademicLevel, setDefaultAcademicLevel] = useState('');
 
     // States for search
     const [courseSearchTerm, setCourseSearchTerm] = useState('');
@@ -49,6 +52,17 @@ const AccountPage = () => {
         }
     }, [sportSearchTerm, sportsCourses]);
 
+    // Levels the catalog offers, for the academic level picker
+    useEffect(() => {
+        fetch('/api/academic-levels')
+            .then((res) => res.json())
+            .then((data) => {
+                setAcademicLevels(data.academic_levels || []);
+                setDefaultAcademicLevel(data.default || '');
+            })
+            .catch((err) => console.error(err));
+    }, []);
+
     // Save Profile Function
     const handleSaveProfile = () => {
         const updatedData = {
@@ -57,6 +71,7 @@ const AccountPage = () => {
             completedCourses,
             sports,
             futureGoals,
+            academicLevel: academicLevel || null,
         };
 
         // Send updated data to the server
@@ -76,6 +91,7 @@ const AccountPage = () => {
                 }
                 toast.success('Profile updated successfully.');
                 setEditing(false);
+                fetchUserProfile(jwtToken);
             })
             .catch((err) => {
                 console.error(err);
@@ -164,6 +180,21 @@ const AccountPage = () => {
                                 />
                             </div>
 
+                            {/* Academic Level Field */}
+                            <div>
+                                <label className="block mb-1 font-semibold">Academic Level</label>
+                                <select
+                                    className="w-full p-2 rounded text-black"
+                                    value={academicLevel}
+                                    onChange={(e) => setAcademicLevel(e.target.value)}
+                                >
+                                    <option value="">Not set ({defaultAcademicLevel || 'default'})</option>
+                                    {academicLevels.map((level) => (
+                                        <option key={level} value={level}>{level}</option>
+                                    ))}
+                                </select>
+                            </div>
+
                             {/* Future Goals Field */}
                             <div>
                                 <label className="block mb-1 font-semibold">Future Goals</label>
@@ -284,6 +315,7 @@ const AccountPage = () => {
                             {/* Display user information */}
                             <p><b>Name:</b> {user?.name}</p>
                             <p><b>Email:</b> {user?.email}</p>
+                            <p><b>Academic Level:</b> {user?.academicLevel || `Not set (${defaultAcademicLevel || 'default'})`}</p>
                             <p><b>Future Goals:</b></p>
                             <ul><li>{user?.futureGoals || 'None'}</li></ul>{/* Life hack to get the same spacing */}
                             
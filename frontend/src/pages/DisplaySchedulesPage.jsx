@@ -10,12 +10,46 @@ const DisplaySchedulesPage = () => {
     const [schedule, setSchedule] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [streamingText, setStreamingText] = useState('');
     const retryCount = useRef(0);
     const maxRetries = 3;
 
+    // Read server-sent events from the streaming endpoint, calling onEvent for each one
+    const readEvents = async (response, onEvent) => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach((line) => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                onEvent(event, data ? JSON.parse(data) : null);
+            }
+        }
+    };
+
     const fetchSchedule = async () => {
         try {
-            const response = await fetch('/api/generate-schedule', {
+            setStreamingText('');
+
+            // Stream the schedule as it is generated, cached schedules arrive as a single event
+            // Retries skip the cache so a bad cached answer isn't served again
+            const url = retryCount.current > 0 ? '/api/generate-schedule/stream?fresh=1' : '/api/generate-schedule/stream';
+            const response = await fetch(url, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -29,13 +63,22 @@ const DisplaySchedulesPage = () => {
                 throw new Error(errorData.message || 'Failed to generate schedule');
             }
 
-            const data = await response.json();
+            let generatedSchedule = null;
+            let streamError = null;
+            await readEvents(response, (event, data) => {
+                if (event === 'token') setStreamingText((prev) => prev + data.content);
+                if (event === 'done') generatedSchedule = data.schedule;
+                if (event === 'error') streamError = data.message;
+            });
+            if (streamError) {
+                throw new Error(streamError);
+            }
 
             // This is a cheating way bc swarm is being weird
-            const isValid = data.schedule?.recommendations.join("").includes("final");
+            const isValid = generatedSchedule?.recommendations.join("").includes("final");
 
             if (isValid) {
-                setSchedule(data.schedule);
+                setSchedule(generatedSchedule);
                 setLoading(false);
             } else {
                 throw new Error('Failed to generate a valid schedule. Please try again.');
@@ -73,7 +116,13 @@ const DisplaySchedulesPage = () => {
 
                     {/* Schedules Grid */}
                     {loading ? (
-                        <p className="text-center">Loading...</p>
+                        streamingText ? (
+                            <div className="bg-white/10 p-4 rounded shadow">
+                                <ReactMarkdown className="p-1">{streamingText}</ReactMarkdown>
+                            </div>
+                        ) : (
+                            <p className="text-center">Loading...</p>
+                        )
                     ) : error ? (
                         <p className="text-red-500">Error: {error}</p>
                     ) : !schedule ? (